@@ -0,0 +1,328 @@
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from ftir_map import read_map_positions
+
+
+class SpectralCube:
+    """
+    (position x wavenumber) array of an FTIR map acquisition, memory-mapped
+    from disk.
+
+    A cube is a directory holding `cube.npy` (one spectrum per row),
+    `positions.npy` (map coordinates of each row) and `wavenumbers.npy`.
+    Only the rows and columns a query touches are read from disk.
+
+    Parameters
+    ----------
+    directory: Path-like
+        Directory written by `SpectralCube.create` or `SpectralCube.from_map`.
+
+    Attributes
+    ----------
+    spectra: np.memmap
+        Read-only array of shape (positions, wavenumbers).
+    positions: np.ndarray
+        Array of shape (positions, 2) with the x and y map coordinates of
+        each row.
+    wavenumbers: np.ndarray
+        Wavenumber of each column, in cm^-1.
+    """
+
+    def __init__(self, directory):
+        directory = Path(directory)
+        self.spectra = np.load(Path(directory, "cube.npy"), mmap_mode="r")
+        self.positions = np.load(Path(directory, "positions.npy"))
+        self.wavenumbers = np.load(Path(directory, "wavenumbers.npy"))
+        self._build_index()
+
+    @classmethod
+    def create(
+        cls,
+        directory,
+        positions: np.ndarray,
+        wavenumbers: np.ndarray,
+        spectra: Iterable[np.ndarray],
+        dtype=np.float32
+    ) -> "SpectralCube":
+        """
+        Writes a cube to disk one spectrum at a time.
+
+        Parameters
+        ----------
+        directory: Path-like
+            Directory to write the cube into (created if needed).
+        positions: np.ndarray
+            Array of shape (positions, 2) with the x and y map coordinates
+            of each spectrum; spectra are indexed on the grid they form.
+        wavenumbers: np.ndarray
+            Wavenumber of each spectral channel.
+        spectra: Iterable[np.ndarray]
+            One spectrum per position, in the order of `positions`. Any
+            iterable works, e.g. a generator decoding the spectra of a .map
+            file, so the spectra never have to be in memory together.
+        dtype: optional
+            Data type stored on disk (default is float32).
+
+        Returns
+        -------
+        cube: SpectralCube
+            The memory-mapped cube.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        positions = np.asarray(positions, dtype=float)
+        wavenumbers = np.asarray(wavenumbers, dtype=float)
+
+        cube = open_memmap(
+            Path(directory, "cube.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(len(positions), len(wavenumbers)),
+        )
+        n = 0
+        for spectrum in spectra:
+            if n == len(positions):
+                raise ValueError("There are more spectra than positions.")
+            cube[n] = spectrum
+            n += 1
+        if n != len(positions):
+            raise ValueError(
+                f"Got {n} spectra for {len(positions)} positions."
+            )
+        cube.flush()
+        del cube
+
+        np.save(Path(directory, "positions.npy"), positions)
+        np.save(Path(directory, "wavenumbers.npy"), wavenumbers)
+        return cls(directory)
+
+    @classmethod
+    def from_map(
+        cls,
+        directory,
+        map_path,
+        wavenumbers: np.ndarray,
+        spectra: Iterable[np.ndarray],
+        dtype=np.float32,
+        coordinates: str = "xy"
+    ) -> "SpectralCube":
+        """
+        Writes a cube pairing the position records of a .map file (see
+        `ftir_map.read_map_positions`) with its spectra.
+
+        Each record holds two coordinate pairs. X/Y step across the mapped
+        area and form the measurement grid (31 x 25 nodes for the 775
+        records of FTIR_parsing.txt). XPos/YPos only take a few values per
+        map (2 and 27 there), so indexing on them would average unrelated
+        spectra into one node.
+
+        Parameters
+        ----------
+        directory: Path-like
+            Directory to write the cube into.
+        map_path: Path-like
+            Path to the .map file.
+        wavenumbers: np.ndarray
+            Wavenumber of each spectral channel.
+        spectra: Iterable[np.ndarray]
+            One spectrum per record of the .map file, in file order.
+        dtype: optional
+            Data type stored on disk (default is float32).
+        coordinates: str, optional
+            "xy" to index the cube on X/Y (the map grid) or "pos" to use
+            XPos/YPos. Default is "xy".
+        """
+        map_positions = read_map_positions(map_path)
+        if coordinates == "xy":
+            x, y = map_positions.x, map_positions.y
+        elif coordinates == "pos":
+            x, y = map_positions.xpos, map_positions.ypos
+        else:
+            raise ValueError(f"{coordinates} is an invalid coordinate pair.")
+        positions = np.column_stack((x, y))
+        return cls.create(directory, positions, wavenumbers, spectra, dtype)
+
+    def __len__(self):
+        return self.spectra.shape[0]
+
+    def _build_index(self):
+        # Rows grouped by their node on the position grid.
+        self.grid_x, ix = np.unique(self.positions[:, 0], return_inverse=True)
+        self.grid_y, iy = np.unique(self.positions[:, 1], return_inverse=True)
+        cells = ix.ravel() * len(self.grid_y) + iy.ravel()
+        self._order = np.argsort(cells, kind="stable")
+        ncells = len(self.grid_x) * len(self.grid_y)
+        self._offsets = np.r_[0, np.bincount(cells, minlength=ncells)].cumsum()
+        self._cells = cells
+
+    def _rows_in_cells(self, ix: np.ndarray, iy: np.ndarray) -> np.ndarray:
+        cells = (ix[:, None] * len(self.grid_y) + iy[None, :]).ravel()
+        blocks = [
+            self._order[self._offsets[i]:self._offsets[i + 1]] for i in cells
+        ]
+        if not blocks:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(blocks))
+
+    def rows_at(self, x: float, y: float) -> np.ndarray:
+        """
+        Rows at the grid node nearest to (x, y).
+        """
+        ix = np.abs(self.grid_x - x).argmin()
+        iy = np.abs(self.grid_y - y).argmin()
+        return self._rows_in_cells(np.array([ix]), np.array([iy]))
+
+    def spectrum(self, x: float, y: float) -> np.ndarray:
+        """
+        Spectrum at the grid node nearest to (x, y), averaged if several
+        spectra were taken there.
+        """
+        return np.asarray(self.spectra[self.rows_at(x, y)], float).mean(0)
+
+    def roi_rows(
+        self, x_min: float, y_min: float, x_max: float, y_max: float
+    ) -> np.ndarray:
+        """
+        Sorted rows whose position lies inside a rectangle (inclusive).
+        """
+        ix = np.arange(
+            np.searchsorted(self.grid_x, x_min, side="left"),
+            np.searchsorted(self.grid_x, x_max, side="right"),
+        )
+        iy = np.arange(
+            np.searchsorted(self.grid_y, y_min, side="left"),
+            np.searchsorted(self.grid_y, y_max, side="right"),
+        )
+        return self._rows_in_cells(ix, iy)
+
+    def roi_mean(
+        self,
+        x_min: float,
+        y_min: float,
+        x_max: float,
+        y_max: float,
+        chunk_rows: int = 4096
+    ) -> np.ndarray:
+        """
+        Mean spectrum of a rectangular region of interest.
+
+        Only the rows inside the region are read, `chunk_rows` at a time.
+
+        Parameters
+        ----------
+        x_min, y_min, x_max, y_max: float
+            Edges of the region in map coordinates.
+        chunk_rows: int, optional
+            Spectra read per chunk (default is 4096).
+
+        Returns
+        -------
+        mean: np.ndarray
+            Mean spectrum (NaN if the region holds no spectra).
+        """
+        rows = self.roi_rows(x_min, y_min, x_max, y_max)
+        total = np.zeros(self.spectra.shape[1])
+        for start in range(0, len(rows), chunk_rows):
+            block = self.spectra[rows[start:start + chunk_rows]]
+            total += block.sum(axis=0, dtype=float)
+        if len(rows) == 0:
+            return np.full(self.spectra.shape[1], np.nan)
+        return total / len(rows)
+
+    def _band(self, low: float, high: float) -> slice:
+        # Contiguous channel range covering [low, high] cm^-1.
+        inside = np.flatnonzero(
+            (self.wavenumbers >= min(low, high)) &
+            (self.wavenumbers <= max(low, high))
+        )
+        if len(inside) < 2:
+            raise ValueError(
+                f"The band {low}-{high} covers fewer than two channels."
+            )
+        return slice(inside[0], inside[-1] + 1)
+
+    def band_integral(
+        self, low: float, high: float, chunk_rows: int = 4096
+    ) -> np.ndarray:
+        """
+        Trapezoid integral of every spectrum over a wavenumber band.
+
+        Parameters
+        ----------
+        low, high: float
+            Band edges in cm^-1 (either order).
+        chunk_rows: int, optional
+            Spectra processed per chunk (default is 4096).
+
+        Returns
+        -------
+        integral: np.ndarray
+            Integrated intensity at each position.
+        """
+        band = self._band(low, high)
+        width = np.abs(np.diff(self.wavenumbers[band]))
+        result = np.empty(len(self))
+        for start in range(0, len(self), chunk_rows):
+            block = np.asarray(
+                self.spectra[start:start + chunk_rows, band], dtype=float
+            )
+            result[start:start + len(block)] = \
+                ((block[:, 1:] + block[:, :-1]) / 2) @ width
+        return result
+
+    def peak_height(
+        self,
+        low: float,
+        high: float,
+        baseline: bool = True,
+        chunk_rows: int = 4096
+    ) -> np.ndarray:
+        """
+        Height of the highest point of every spectrum within a band.
+
+        Parameters
+        ----------
+        low, high: float
+            Band edges in cm^-1 (either order).
+        baseline: bool, optional
+            Subtract a straight baseline through the two band edges (default
+            is True).
+        chunk_rows: int, optional
+            Spectra processed per chunk (default is 4096).
+
+        Returns
+        -------
+        height: np.ndarray
+            Peak height at each position.
+        """
+        band = self._band(low, high)
+        wn = self.wavenumbers[band]
+        fraction = (wn - wn[0]) / (wn[-1] - wn[0])
+        result = np.empty(len(self))
+        for start in range(0, len(self), chunk_rows):
+            block = np.asarray(
+                self.spectra[start:start + chunk_rows, band], dtype=float
+            )
+            if baseline:
+                block = block - (
+                    block[:, :1] + (block[:, -1:] - block[:, :1]) * fraction
+                )
+            result[start:start + len(block)] = block.max(axis=1)
+        return result
+
+    def to_grid(self, values: np.ndarray) -> np.ndarray:
+        """
+        Arranges one value per position on the position grid for plotting
+        with `imshow`/`pcolormesh` (rows follow `grid_y`, columns `grid_x`).
+        Nodes with several spectra get their mean; empty nodes are NaN.
+        """
+        ncells = len(self.grid_x) * len(self.grid_y)
+        total = np.bincount(self._cells, weights=values, minlength=ncells)
+        count = np.bincount(self._cells, minlength=ncells)
+        with np.errstate(invalid="ignore"):
+            grid = total / count
+        return grid.reshape(len(self.grid_x), len(self.grid_y)).T
@@ -0,0 +1,149 @@
+import mmap
+import re
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+
+# One stage-position record of an FTIR array-map file, e.g.
+# b"XPos=-3155.18, YPos= 205.75, X=-3342.68, Y= 230.75"
+_number = rb"\s*(-?\d+(?:\.\d*)?)"
+record_pattern = re.compile(
+    rb"XPos=" + _number + rb",\s*YPos=" + _number +
+    rb",\s*X=" + _number + rb",\s*Y=" + _number
+)
+
+# Longest record the scanner has to see whole across a chunk boundary.
+MAX_RECORD_BYTES = 256
+
+# Shortest record `record_pattern` matches, b"XPos=1,YPos=1,X=2,Y=3".
+MIN_RECORD_BYTES = 21
+
+
+class MapPositions(NamedTuple):
+    """Stage positions of every record in a .map file, in file order."""
+    xpos: np.ndarray
+    ypos: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+
+
+def iter_map_chunks(
+    path, chunk_size: int = 1 << 24, overlap: int = MAX_RECORD_BYTES
+) -> Iterator[np.ndarray]:
+    """
+    Scans an FTIR .map file chunk by chunk for position records.
+
+    The file is memory-mapped and searched with a compiled bytes regex, so
+    only the pages being scanned are read and no decoded copy of the file
+    is made. Each window extends `overlap` bytes past its chunk, so a record
+    that starts in a chunk is matched whole even if it crosses the boundary;
+    it is reported with the chunk it starts in.
+
+    Parameters
+    ----------
+    path: Path-like
+        Path to the .map file.
+    chunk_size: int, optional
+        Bytes scanned per chunk (default is 16 MiB).
+    overlap: int, optional
+        Bytes read past the end of each chunk. Must be at least the length
+        of the longest record (default is 256).
+
+    Yields
+    ------
+    records: np.ndarray
+        Array of shape (records, 4) with XPos, YPos, X and Y of the records
+        starting in the next chunk.
+    """
+    with open(Path(path), "rb") as f:
+        size = Path(path).stat().st_size
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            while pos < size:
+                stop = min(pos + chunk_size, size)
+                scan_stop = min(stop + overlap, size)
+                next_pos = stop
+
+                # Matches do not overlap, so at most one record starts in
+                # every MIN_RECORD_BYTES of chunk.
+                records = np.empty(((stop - pos) // MIN_RECORD_BYTES + 1, 4))
+                n = 0
+                for match in record_pattern.finditer(mm, pos, scan_stop):
+                    if match.start() >= stop:
+                        break
+                    if match.end() == scan_stop and scan_stop < size:
+                        # The last number may continue past the window;
+                        # rescan this record with the next chunk.
+                        if match.start() == pos:
+                            raise ValueError(
+                                f"A record at byte {pos} is longer than "
+                                f"chunk_size + overlap."
+                            )
+                        next_pos = match.start()
+                        break
+                    records[n] = [float(i) for i in match.groups()]
+                    n += 1
+                yield records[:n]
+                pos = next_pos
+
+
+def read_map_positions(
+    path, chunk_size: int = 1 << 24, overlap: int = MAX_RECORD_BYTES
+) -> MapPositions:
+    """
+    Reads every position record of an FTIR .map file into NumPy arrays.
+
+    Records are copied chunk by chunk from `iter_map_chunks` into one
+    preallocated array that doubles in size when full.
+
+    Parameters
+    ----------
+    path: Path-like
+        Path to the .map file.
+    chunk_size: int, optional
+        Bytes scanned per chunk (default is 16 MiB).
+    overlap: int, optional
+        Bytes read past the end of each chunk (default is 256).
+
+    Returns
+    -------
+    positions: MapPositions
+        XPos, YPos, X and Y of every record, in file order.
+    """
+    buffer = np.empty((4096, 4))
+    n = 0
+    for records in iter_map_chunks(path, chunk_size, overlap):
+        if n + len(records) > len(buffer):
+            grown = np.empty((max(2 * len(buffer), n + len(records)), 4))
+            grown[:n] = buffer[:n]
+            buffer = grown
+        buffer[n:n + len(records)] = records
+        n += len(records)
+    positions = buffer[:n].T.copy()
+    return MapPositions(*positions)
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    if len(sys.argv) > 1:
+        positions = read_map_positions(sys.argv[1])
+        print(f"{len(positions.x)} records")
+        sys.exit()
+
+    # Regression check: back-to-back records of the shortest length fill
+    # every chunk to capacity, at chunk sizes on and off record boundaries.
+    record = b"XPos=1,YPos=1,X=2,Y=3"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, "short.map")
+        path.write_bytes(record * 1000)
+        for chunk_size in (21, 64, 4096, 1 << 24):
+            positions = read_map_positions(path, chunk_size=chunk_size)
+            assert len(positions.x) == 1000, chunk_size
+            assert (positions.y == 3).all(), chunk_size
+    print("ok")
@@ -0,0 +1,96 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+
+repo_root = Path(__file__).resolve().parents[1]
+
+# Import-time budget in ms of each package, and the heavy dependencies that
+# importing it must not pull in.
+budgets = {
+    "module1": (50, ("matplotlib",)),
+    "module2": (200, ("pandas", "matplotlib")),
+    "module2.schema": (200, ("pandas", "matplotlib")),
+}
+
+
+def measure_import(
+    module: str, forbidden: tuple[str, ...] = ()
+) -> tuple[float, list[str]]:
+    """
+    Imports a module in a fresh interpreter and measures how long it takes.
+
+    Parameters
+    ----------
+    module: str
+        Dotted module name, importable from the repository root.
+    forbidden: tuple[str, ...], optional
+        Top-level packages to look for in `sys.modules` after the import.
+
+    Returns
+    -------
+    time_ms: float
+        Cumulative import time of `module` reported by `-X importtime`.
+    loaded: list[str]
+        The `forbidden` packages that were imported.
+    """
+    code = f"import {module}, sys; " \
+        f"print(','.join(i for i in {forbidden!r} if i in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=repo_root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Lines read "import time: self [us] | cumulative | name"; the module
+    # itself is reported last.
+    time_us = None
+    for line in result.stderr.splitlines():
+        fields = line.split("|")
+        if len(fields) == 3 and fields[2].strip() == module:
+            time_us = int(fields[1])
+    if time_us is None:
+        raise RuntimeError(f"No import time reported for {module}.")
+    loaded = result.stdout.strip()
+    return time_us / 1000, loaded.split(",") if loaded else []
+
+
+def check_budgets(runs: int = 5) -> bool:
+    """
+    Checks every module in `budgets`, printing one line per module.
+
+    The fastest of `runs` imports is compared with the budget, which keeps
+    the check stable on a busy machine.
+
+    Returns
+    -------
+    passed: bool
+        True if every module is within budget and imports none of its
+        forbidden packages.
+    """
+    passed = True
+    for module, (budget, forbidden) in budgets.items():
+        times = []
+        for _ in range(runs):
+            time_ms, loaded = measure_import(module, forbidden)
+            times.append(time_ms)
+        time_ms = min(times)
+        ok = time_ms <= budget and not loaded
+        passed &= ok
+        line = f"{'ok' if ok else 'FAIL':4} {module:16} {time_ms:7.1f} ms " \
+               f"(budget {budget} ms)"
+        if loaded:
+            line += f", imports {', '.join(loaded)}"
+        print(line)
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Checks the import time of the course packages."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(0 if check_budgets(args.runs) else 1)
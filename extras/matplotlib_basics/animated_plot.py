@@ -1,121 +1,312 @@
-from typing import Callable
+import shutil
+import subprocess
+from itertools import chain
+from typing import Iterator, NamedTuple
+from matplotlib import rcParams
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import numpy as np
+from PIL import Image
 
+from ode_solver import oscillator, solve_fixed
 
-def euler_solver(
-    f: Callable, t: float, y: np.ndarray, h: float = 0.05, *args, **kwargs
+
+def damped_oscillator(
+    t: np.ndarray,
+    x0: float = 0,
+    v0: float = 8,
+    m: float = 1,
+    omega: float = 1,
+    c: float = 0
 ) -> np.ndarray:
     """
-    Euler method for numerically solving coupled ODEs.
+    Analytical position of the oscillator integrated by
+    `ode_solver.oscillator`, x'' = -c x' - k x with k = m * omega**2.
 
     Parameters
     ----------
-    f: Callable
-        Function for the coupled ODEs you are trying to solve.
-    t: float
-        Independent variable, usually time.
-    y: np.ndarray
-        Array of current coupled ODE values.
-    h: float, optional
-        Step size for Euler Method (default is 0.05)
+    t: np.ndarray
+        Times to evaluate.
+    x0, v0: float, optional
+        Initial position and velocity (defaults are 0 and 8).
+    m, omega, c: float, optional
+        Mass, angular frequency and damping (defaults are 1, 1 and 0).
 
     Returns
     -------
-    y_n+1: np.ndarray
-        Next estimation step for estimating y(t)
+    x: np.ndarray
+        Position at each time.
     """
-    return h * f(t, y, *args, **kwargs)
-
+    t = np.asarray(t, dtype=float)
+    envelope = np.exp(-c * t / 2)
+    b = v0 + c * x0 / 2
+    square = m * omega**2 - c**2 / 4
+    if square > 0:
+        # Underdamped: oscillates at the damped frequency.
+        omega_d = np.sqrt(square)
+        return envelope * (
+            x0 * np.cos(omega_d * t) + b / omega_d * np.sin(omega_d * t)
+        )
+    if square < 0:
+        # Overdamped
+        gamma = np.sqrt(-square)
+        return envelope * (
+            x0 * np.cosh(gamma * t) + b / gamma * np.sinh(gamma * t)
+        )
+    # Critically damped
+    return envelope * (x0 + b * t)
 
-def oscillator(
-    t: float, r: np.ndarray, omega: float = 1, m: float = 1, c: float = 0
-) -> np.ndarray:
-    """Coupled ODEs of a damped simple harmonic oscillator"""
-    k = m * omega**2
-    dx = r[1]
-    dv = -c * dx - k * r[0]
-    return np.array([dx, dv], float)
 
+class Trajectory(NamedTuple):
+    """Everything an animation frame needs, computed before rendering."""
+    frames: np.ndarray
+    position: np.ndarray
+    real: np.ndarray
+    ylim: np.ndarray
 
-def make_animation():
-    # Initializing plot
-    f, ax = plt.subplots()
 
-    # Number of time steps to run
-    N = 1000
+def precompute_trajectory(
+    N: int = 1000,
+    h: float = 0.05,
+    x0: float = 0,
+    v0: float = 8,
+    m: float = 1,
+    omega: float = 1,
+    c: float = 0,
+    base_limit: float = 15,
+    headroom: float = 1.25
+) -> Trajectory:
+    """
+    Integrates the oscillator and computes the axis limits of every frame.
 
-    # Creating empty arrays to store ODE info
-    r_data = np.zeros((N, 2), float)
-    sin_data = np.zeros(N, float)
-    t_data = np.zeros(N, float)
+    Parameters
+    ----------
+    N: int, optional
+        Number of frames (default is 1000).
+    h: float, optional
+        Euler step size (default is 0.05).
+    x0, v0: float, optional
+        Initial position and velocity (defaults are 0 and 8).
+    m, omega, c: float, optional
+        Mass, angular frequency and damping (defaults are 1, 1 and 0).
+    base_limit: float, optional
+        Smallest y-limit, in both directions (default is 15).
+    headroom: float, optional
+        Factor by which a y-limit grows when the running minimum or maximum
+        of the Euler solution passes it (default is 1.25). Growing in steps
+        keeps the number of limit changes, and full redraws, small.
 
-    # Initial position and velocity of oscillator
-    x0 = 0
-    v0 = 8
+    Returns
+    -------
+    trajectory: Trajectory
+        Frame numbers, Euler positions, analytical solution (see
+        `damped_oscillator`) and y-limits of every frame.
+    """
+    t = np.arange(N) * h
+    r = solve_fixed(oscillator, [x0, v0], t, "euler", args=(omega, m, c))[0]
+    real = damped_oscillator(t, x0, v0, m, omega, c)
 
-    # Harmonic Oscillator Specs
-    m = 1
-    omega = 1
-    c = 0 * np.sqrt(m * m * omega**2)
+    # Running extremes of position and velocity, as the live animation
+    # tracked them, rounded up to the next step of the limit.
+    low = np.minimum.accumulate(r.min(axis=1))
+    high = np.maximum.accumulate(r.max(axis=1))
+    steps = np.ceil(
+        np.log(np.maximum(np.c_[-low, high], base_limit) / base_limit) /
+        np.log(headroom)
+    )
+    ylim = base_limit * headroom**steps
+    ylim[:, 0] *= -1
+    return Trajectory(np.arange(N, dtype=float), r[:, 0], real, ylim)
 
-    # Putting initial values into info arrays
-    r_data[0, :] = [x0, v0]  # position and velocity
-    sin_data[0] = 0  # analytical solution of the harmonic oscillator
-    t_data[0] = 0  # time values
 
-    # Making plot objects
-    (pt,) = plt.plot(0, r_data[0, 0], color="k", marker="o")
-    (lin,) = plt.plot(
+def _setup_artists(ax, trajectory: Trajectory):
+    # Artists and the per-frame update. Updating a frame only points the
+    # artists at views of the precomputed arrays; it returns True when the
+    # y-limits changed, which needs a full redraw.
+    frame_axis, position, real, ylim = trajectory
+    (pt,) = ax.plot(0, position[0], color="k", marker="o")
+    (lin,) = ax.plot(
         0,
-        r_data[0, 0],
+        position[0],
         color="k",
         linestyle="--",
         label="Euler Solver Oscillator",
     )
-    (pt_real,) = plt.plot(0, 0, color="r", marker="o")
-    (lin_real,) = plt.plot(
+    (pt_real,) = ax.plot(0, 0, color="r", marker="o")
+    (lin_real,) = ax.plot(
         0, 0, color="r", linestyle="--", label="Real Harmonic Oscillator"
     )
-    ax.set_ylim(-15, 15)
-    ax.set_xlim(0, N)
+    ax.set_ylim(*ylim[0])
+    ax.set_xlim(0, len(frame_axis))
     ax.legend(loc="upper left")
+    current = ylim[0].copy()
 
-    def step(frame):
-        # Filling data arrays
-        rnew = r_data[frame, :] + euler_solver(
-            oscillator, frame, r_data[frame, :], m=m, omega=omega, c=c
-        )
-        r_data[frame + 1, :] = rnew
-        sin_data[frame + 1] = (
-            np.exp(-c * frame * 0.05) * v0 * np.sin(0.05 * frame)
-        )
-        t_data[frame + 1] = frame
+    def update(frame: int) -> bool:
+        pt.set_data(frame_axis[frame:frame + 1], position[frame:frame + 1])
+        lin.set_data(frame_axis[:frame], position[:frame])
+        pt_real.set_data(frame_axis[frame:frame + 1], real[frame:frame + 1])
+        lin_real.set_data(frame_axis[:frame], real[:frame])
+        if (ylim[frame] == current).all():
+            return False
+        current[:] = ylim[frame]
+        ax.set_ylim(*current)
+        return True
 
-        # Setting new data for the Euler solution
-        pt.set_data([frame], [r_data[frame, 0]])
-        lin.set_data(t_data[:frame], r_data[:frame, 0])
+    return [pt, lin, pt_real, lin_real], update
 
-        # Setting new dat a for analytical solution
-        pt_real.set_data([frame], [sin_data[frame]])
-        lin_real.set_data(t_data[:frame], sin_data[:frame])
 
-        # Dynamically setting limits
-        _ymin = np.min(r_data[: frame + 1])
-        _ymax = np.max(r_data[: frame + 1])
-        if _ymin < -15 or _ymax > 15:
-            ax.set_ylim(_ymin - 0.05 * _ymin, _ymax + 0.05 * _ymax)
+def make_animation(N: int = 1000, **kwargs) -> FuncAnimation:
+    """
+    Shows the Euler solution of the oscillator next to the analytical one.
+
+    The trajectory is computed up front (see `precompute_trajectory`), so
+    frames only update artist data and are drawn with blitting.
 
-        return [pt, lin, pt_real, lin_real]
+    Parameters
+    ----------
+    N: int, optional
+        Number of frames (default is 1000).
+    **kwargs
+        Passed to `precompute_trajectory`.
+    """
+    f, ax = plt.subplots()
+    artists, update = _setup_artists(ax, precompute_trajectory(N, **kwargs))
+
+    def step(frame):
+        if update(frame):
+            # Blitting only redraws the artists, so new ticks need one full
+            # draw.
+            f.canvas.draw()
+        return artists
 
     anim = FuncAnimation(f, step, frames=N - 1, interval=1, blit=True)
     plt.show()
-    anim.save("./animation.gif")
+    return anim
+
+
+def render_frames(
+    N: int = 1000, decimate: int = 1, dpi: int = 80, **kwargs
+) -> Iterator[np.ndarray]:
+    """
+    Renders animation frames off-screen with the Agg backend.
+
+    The axes, ticks and legend are drawn once and kept as a background;
+    each frame restores it and draws only the four animated artists. The
+    background is redrawn only on the few frames where the y-limits grow.
+
+    Parameters
+    ----------
+    N: int, optional
+        Number of simulated frames (default is 1000).
+    decimate: int, optional
+        Render every `decimate`-th frame (default is 1).
+    dpi: int, optional
+        Resolution of the frames (default is 80).
+    **kwargs
+        Passed to `precompute_trajectory`.
+
+    Yields
+    ------
+    frame: np.ndarray
+        RGBA image of shape (height, width, 4). The array is reused for the
+        next frame, so copy it to keep it.
+    """
+    fig = Figure(dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    artists, update = _setup_artists(ax, precompute_trajectory(N, **kwargs))
+    for artist in artists:
+        artist.set_animated(True)
+
+    background = None
+    for frame in range(0, N - 1, decimate):
+        if update(frame) or background is None:
+            canvas.draw()
+            background = canvas.copy_from_bbox(fig.bbox)
+        canvas.restore_region(background)
+        for artist in artists:
+            ax.draw_artist(artist)
+        yield np.asarray(canvas.buffer_rgba())
+
+
+def save_animation(
+    path="./animation.gif",
+    N: int = 1000,
+    decimate: int = 1,
+    fps: int = 50,
+    dpi: int = 80,
+    **kwargs
+):
+    """
+    Renders the animation to a file without opening a window.
+
+    Frames come from `render_frames` and are piped to ffmpeg one at a time
+    when it is installed. Otherwise Pillow writes the file (GIF only), which
+    keeps the palette-reduced frames in memory until the end.
+
+    Parameters
+    ----------
+    path: Path-like, optional
+        Output file; the extension picks the format (default is
+        "./animation.gif").
+    N: int, optional
+        Number of simulated frames (default is 1000).
+    decimate: int, optional
+        Render every `decimate`-th frame (default is 1).
+    fps: int, optional
+        Frames per second of the output (default is 50).
+    dpi: int, optional
+        Resolution of the output (default is 80).
+    **kwargs
+        Passed to `precompute_trajectory`.
+    """
+    frames = render_frames(N, decimate, dpi, **kwargs)
+    ffmpeg = shutil.which(rcParams["animation.ffmpeg_path"])
+    if ffmpeg is not None:
+        first = next(frames)
+        height, width = first.shape[:2]
+        command = [
+            ffmpeg, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgba",
+            "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+            str(path),
+        ]
+        with subprocess.Popen(
+            command, stdin=subprocess.PIPE, bufsize=0
+        ) as process:
+            try:
+                for frame in chain([first], frames):
+                    process.stdin.write(frame.tobytes())
+            except BrokenPipeError:
+                # ffmpeg exited early; its exit code is checked below.
+                pass
+        if process.returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg exited with code {process.returncode} while "
+                f"writing {path}."
+            )
+        return
+
+    images = [
+        Image.fromarray(frame[..., :3]).quantize(
+            method=Image.Quantize.FASTOCTREE
+        )
+        for frame in frames
+    ]
+    images[0].save(
+        path,
+        save_all=True,
+        append_images=images[1:],
+        duration=1000 / fps,
+        loop=0,
+    )
 
 
 if __name__ == "__main__":
     make_animation()
+    save_animation("./animation.gif")
 
 # def make_animation():
 #     # Initializing plot
@@ -1,3 +1,5 @@
+import time
+
 from matplotlib.backend_bases import Event, MouseEvent
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
@@ -5,10 +7,67 @@ import numpy as np
 
 
 class InteractivePlot:
-    def __init__(self, amplitude: float, freq: float):
+    """
+    Sine curve controlled by amplitude and frequency sliders; clicks on the
+    plot are marked.
+
+    Slider events are coalesced: the first event starts a timer and every
+    event arriving before it fires only updates the slider values, so one
+    recompute and one draw serve a whole burst. The curve is written into a
+    reusable buffer. With a stepped frequency slider (`freq_step`), it is
+    taken from a table of sin(freq * x) over the steps when the table fits
+    in `max_table_bytes`.
+
+    Parameters
+    ----------
+    amplitude: float
+        Initial amplitude.
+    freq: float
+        Initial frequency.
+    npoints: int, optional
+        Number of x values (default is 1000).
+    freq_step: float, optional
+        Step of the frequency slider, which is also the grid of the lookup
+        table, e.g. 0.05. Default is None, a continuous slider without a
+        table.
+    throttle_ms: float, optional
+        Shortest time between redraws in ms (default is 16).
+    max_table_bytes: int, optional
+        Largest lookup table to precompute (default is 32 MB).
+
+    Attributes
+    ----------
+    stats: dict
+        Number of clicks, slider events and redraws. For the last redraw,
+        the queueing delay (first coalesced event to the throttle timer
+        firing, about `throttle_ms` by design), the compute time and the
+        redraw time (recompute plus draw). Also the slowest redraw and the
+        number of redraws slower than `budget_ms`.
+    """
+
+    budget_ms = 16.0
+
+    def __init__(
+        self,
+        amplitude: float,
+        freq: float,
+        npoints: int = 1000,
+        freq_step: float | None = None,
+        throttle_ms: float = 16,
+        max_table_bytes: int = 32 * 2**20
+    ):
         self.amp = amplitude
         self.freq = freq
-        self.xdata = np.linspace(0, 10, 1000)
+        self.xdata = np.linspace(0, 10, npoints)
+        self._ydata = np.empty_like(self.xdata)
+
+        # Lookup table of sin(freq * x) for every frequency step.
+        self._freq_grid = None
+        if freq_step is not None:
+            grid = np.arange(1, 10 + freq_step / 2, freq_step)
+            if grid.size * self.xdata.nbytes <= max_table_bytes:
+                self._freq_grid = grid
+                self._table = np.sin(np.multiply.outer(grid, self.xdata))
 
         # Setting up figure
         fig, self.main_ax = plt.subplots()
@@ -21,7 +80,7 @@ class InteractivePlot:
         self.axamp = fig.add_axes((0.1, 0.25, 0.0225, 0.63))
 
         self.freq_slider = Slider(
-            self.axfreq, "Frequency", 1, 10, valinit=freq
+            self.axfreq, "Frequency", 1, 10, valinit=freq, valstep=freq_step
         )
         self.amp_slider = Slider(
             self.axamp,
@@ -31,24 +90,92 @@ class InteractivePlot:
             valinit=amplitude,
             orientation="vertical",
         )
+        # The sliders do not redraw themselves; _flush draws once per burst.
+        self.freq_slider.drawon = False
+        self.amp_slider.drawon = False
 
         (self.sine_plot,) = self.main_ax.plot(
             self.xdata,
-            self.amp * np.sin(self.freq * self.xdata),
+            self._curve(self.amp, self.freq),
             linestyle="-",
             color="red",
         )
 
+        # One scatter holds every click; its offsets grow in place.
+        self._clicks = np.empty((64, 2))
+        self.click_plot = self.main_ax.scatter(
+            [], [], color="red", zorder=3
+        )
+
         # Setting limits
         self.main_ax.set(xlim=(0, 10), ylim=(-10, 10))
 
         # Setting stats attribute
-        self.stats = {"num_clicks": 0}
+        self.stats = {
+            "num_clicks": 0,
+            "num_events": 0,
+            "num_redraws": 0,
+            "last_queue_ms": 0.0,
+            "last_compute_ms": 0.0,
+            "last_redraw_ms": 0.0,
+            "max_redraw_ms": 0.0,
+            "over_budget": 0,
+        }
+        self._first_event = None
+        self._flush_start = None
+        self._timer = self.canvas.new_timer(interval=int(throttle_ms))
+        self._timer.single_shot = True
+        self._timer.add_callback(self._flush)
+        self._dirty = False
 
         self.canvas.mpl_connect("button_press_event", self.on_click)
+        self.canvas.mpl_connect("draw_event", self._on_draw)
         self.amp_slider.on_changed(self.on_changed)
         self.freq_slider.on_changed(self.on_changed)
 
+    def _curve(self, amplitude: float, freq: float) -> np.ndarray:
+        # amplitude * sin(freq * x), written into the reusable buffer.
+        if self._freq_grid is not None:
+            i = np.abs(self._freq_grid - freq).argmin()
+            if np.isclose(self._freq_grid[i], freq):
+                return np.multiply(self._table[i], amplitude, out=self._ydata)
+        np.multiply(self.xdata, freq, out=self._ydata)
+        np.sin(self._ydata, out=self._ydata)
+        self._ydata *= amplitude
+        return self._ydata
+
+    def _request_redraw(self):
+        # Coalesces redraw requests until the throttle timer fires.
+        if self._first_event is None:
+            self._first_event = time.perf_counter()
+            self._timer.start()
+
+    def _flush(self):
+        start = time.perf_counter()
+        self.stats["last_queue_ms"] = 1000 * (start - self._first_event)
+        # Events from here on start a new timer.
+        self._first_event = None
+        self._flush_start = start
+        if self._dirty:
+            self._curve(self.amp_slider.val, self.freq_slider.val)
+            self.sine_plot.set_ydata(self._ydata)
+            self._dirty = False
+        self.stats["last_compute_ms"] = 1000 * (time.perf_counter() - start)
+        self.canvas.draw_idle()
+
+    def _on_draw(self, event: Event):
+        if self._flush_start is None:
+            return
+        redraw = 1000 * (time.perf_counter() - self._flush_start)
+        self._flush_start = None
+        self.stats["num_redraws"] += 1
+        self.stats["last_redraw_ms"] = redraw
+        self.stats["max_redraw_ms"] = max(
+            self.stats["max_redraw_ms"], redraw
+        )
+        if redraw > self.budget_ms:
+            self.stats["over_budget"] += 1
+
     def on_click(self, event: Event):
         # Filters bad events
         if not isinstance(event, MouseEvent):
@@ -59,26 +186,31 @@ class InteractivePlot:
 
         # Filtes clicks that are off the figure
         if event.xdata is not None and event.ydata is not None:
-            self.main_ax.scatter(event.xdata, event.ydata, color="red")
+            n = self.stats["num_clicks"]
+            if n == len(self._clicks):
+                self._clicks = np.concatenate(
+                    [self._clicks, np.empty_like(self._clicks)]
+                )
+            self._clicks[n] = event.xdata, event.ydata
             self.stats["num_clicks"] += 1
+            self.click_plot.set_offsets(self._clicks[:n + 1])
             print(
                 f"You have clicked the plot {self.stats["num_clicks"]} times."
             )
 
-        self.canvas.draw_idle()
+        self._request_redraw()
 
     def on_changed(self, val: float):
-        new_data = self.amp_slider.val * np.sin(
-            self.freq_slider.val * self.xdata
-        )
-        self.sine_plot.set_data(self.xdata, new_data)
-        self.canvas.draw_idle()
+        self.stats["num_events"] += 1
+        self._dirty = True
+        self._request_redraw()
 
     def show(self):
         plt.show()
 
 
-rng = np.random.default_rng()
-data = rng.normal(0, 1, (100, 2))
-my_interactive_plot = InteractivePlot(amplitude=4, freq=4)
-my_interactive_plot.show()
+if __name__ == "__main__":
+    rng = np.random.default_rng()
+    data = rng.normal(0, 1, (100, 2))
+    my_interactive_plot = InteractivePlot(amplitude=4, freq=4)
+    my_interactive_plot.show()
@@ -1,5 +1,25 @@
-from .module1 import plot_random
+import importlib
+
+# Submodules are imported on first access, so importing the package does
+# not import matplotlib.
+_lazy_exports = {
+    "DensityImage": ".module1",
+    "plot_random": ".module1",
+}
 
 __all__ = [
-    plot_random
+    "plot_random"
 ]
+
+
+def __getattr__(name: str):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_lazy_exports[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_exports))
@@ -1,15 +1,138 @@
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.image import AxesImage
 
 
-def plot_random(N: int) -> float:
+class DensityImage(AxesImage):
+    """
+    Draws a large point cloud as a 2-D histogram of the points in view.
+
+    The histogram is rebinned over the visible extent whenever the axes
+    limits change (e.g. on zoom or pan), at draw time, so changing both
+    limits at once costs one binning. Once at most `max_points` points are
+    in view they are drawn as markers instead.
+
+    Parameters
+    ----------
+    ax: Axes
+        Axes to draw into.
+    x, y: np.ndarray
+        Point coordinates.
+    bins: int or tuple[int, int], optional
+        Number of histogram bins along x and y (default is 256).
+    max_points: int, optional
+        Most points in view that are drawn as markers (default is 100000).
+    **kwargs
+        Passed to `AxesImage`, e.g. `cmap` (default norm is "log").
+
+    Attributes
+    ----------
+    points: Line2D
+        Marker artist used when few points are in view.
+    """
+
+    def __init__(
+        self,
+        ax,
+        x: np.ndarray,
+        y: np.ndarray,
+        bins: int | tuple[int, int] = 256,
+        max_points: int = 100_000,
+        **kwargs
+    ):
+        kwargs.setdefault("norm", "log")
+        super().__init__(
+            ax, origin="lower", interpolation="nearest", **kwargs
+        )
+        # Sorting by x makes the points in view one slice plus a y mask.
+        order = np.argsort(x, kind="stable")
+        self._x = np.ascontiguousarray(x[order], dtype=float)
+        self._y = np.ascontiguousarray(y[order], dtype=float)
+        self.bins = (bins, bins) if np.ndim(bins) == 0 else tuple(bins)
+        self.max_points = max_points
+        self._limits = None
+        self._view_extent = [
+            self._x[0], self._x[-1], self._y.min(), self._y.max()
+        ]
+        self._raw = False
+        self.set_data(np.ma.masked_all((1, 1)))
+
+        (self.points,) = ax.plot(
+            [], [], linestyle="none", marker="x", color="red"
+        )
+        ax.add_image(self)
+        ax.update_datalim([
+            self._view_extent[::2], self._view_extent[1::2]
+        ])
+        ax.autoscale_view()
+
+    def get_extent(self):
+        return self._view_extent
+
+    def in_view(self, x0, x1, y0, y1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Coordinates of the points inside a rectangle.
+        """
+        start = np.searchsorted(self._x, x0, side="left")
+        stop = np.searchsorted(self._x, x1, side="right")
+        y = self._y[start:stop]
+        mask = (y >= y0) & (y <= y1)
+        return self._x[start:stop][mask], y[mask]
+
+    def _update(self, x0, x1, y0, y1):
+        x, y = self.in_view(x0, x1, y0, y1)
+        self._raw = len(x) <= self.max_points
+        if self._raw:
+            self.points.set_data(x, y)
+            return
+        self.points.set_data([], [])
+
+        # Vectorized histogram2d: flat bin index of every point, counted
+        # with bincount.
+        nx, ny = self.bins
+        ix = ((x - x0) * (nx / (x1 - x0))).astype(np.intp)
+        iy = ((y - y0) * (ny / (y1 - y0))).astype(np.intp)
+        np.minimum(ix, nx - 1, out=ix)
+        np.minimum(iy, ny - 1, out=iy)
+        counts = np.bincount(iy * nx + ix, minlength=nx * ny)
+        counts = np.ma.masked_equal(counts.reshape(ny, nx), 0)
+
+        self._view_extent = [x0, x1, y0, y1]
+        self.set_data(counts)
+        self.norm.autoscale(counts)
+
+    def draw(self, renderer):
+        x0, x1 = sorted(self.axes.get_xlim())
+        y0, y1 = sorted(self.axes.get_ylim())
+        if (x0, x1, y0, y1) != self._limits:
+            self._limits = (x0, x1, y0, y1)
+            self._update(x0, x1, y0, y1)
+        if not self._raw:
+            super().draw(renderer)
+
+
+def plot_random(
+    N: int,
+    max_points: int = 100_000,
+    bins: int = 256,
+    ax=None
+) -> float:
     """
     Makes a scatter plot of some random numbers.
 
+    Above `max_points` points the plot switches to a `DensityImage`, which
+    shows a histogram of the points in view and their markers once few
+    enough are in view.
+
     Parameters
     ----------
     N: int
         Number of points to plot.
+    max_points: int, optional
+        Most points drawn as markers (default is 100000).
+    bins: int, optional
+        Histogram bins along each axis in density mode (default is 256).
+    ax: Axes, optional
+        Axes to plot into (default is the current axes).
 
     Returns
     -------
@@ -19,13 +142,21 @@ def plot_random(N: int) -> float:
     rng = np.random.default_rng()
     x = rng.normal(3, 3, N)
     y = rng.normal(0, 2, N)
-    plt.scatter(x, y, marker='x', color='red')
+    if ax is None:
+        import matplotlib.pyplot as plt
+        ax = plt.gca()
+    if N <= max_points:
+        ax.scatter(x, y, marker='x', color='red')
+    else:
+        DensityImage(ax, x, y, bins=bins, max_points=max_points)
     print("TEST")
 
     return np.mean(x)
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     mu = plot_random(500)
     print(f"Mean X of Data: {mu:.3f}")
     plt.show()
@@ -1,6 +1,9 @@
 # module2/GeochemDataset.py
+from __future__ import annotations
 
 # Standard Libraries
+import io
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # External Imports
@@ -8,15 +11,36 @@ import numpy as np
 import pandas as pd
 # import matplotlib.pyplot as plt
 
-
-process_dict = {
-    "XRF26": "Fluxed Glass Disk X-Ray Fluorescence Spectrometry",
-    "ICP06": "Inductively Coupled Plasma Atomic Emission Spectroscopy",
-    "MS81": "Fluxed-Glass Disk ICP-MS",
-    "4ACD81": "Four Acid Digestions before ICP-MS",
-    "MS42": "Aqua Regia Digestion before ICP-MS",
-    "XRF05": "Powdered X-Ray Fluorescence Spectrometry",
-}
+# Local Imports
+from .aggregation import GroupedDataset
+from .cache import cache_key, load_cached_dataset, store_cached_dataset
+from .classification import (
+    classify_silica,
+    classify_tas,
+    major_oxides,
+    tas_fields,
+)
+from .detection import flag_detection_limits, substitute_below_detection
+from .normalization import normalize
+from .qc import StandardsQC
+from .query import DatasetIndex
+from .reconcile import (
+    ReconciledMeasurements,
+    default_method_priority,
+    reconcile_measurements,
+)
+from .schema import (
+    ElementalMeasurement,
+    MeasurementSchema,
+    MeasurementValue,
+    header_pattern,
+    non_element_names,
+    parse_elemental_measurements,
+    parse_measurement_schema,
+    process_dict,
+    split_header,
+)
+from .spatial import SpatialIndex
 
 
 def findall(needle, haystack):
@@ -30,52 +54,53 @@ def findall(needle, haystack):
     return all_occurences
 
 
-class ElementalMeasurement:
+class _MeasurementRow:
     """
-    Stores data about a measurement process, unit and elemental component.
-
-    Parameters
-    ----------
-    element_string: str
-        Column name of geochemical data spreadsheet, in the format:
-        element_unit_XX_process
+    Lightweight accessor for one row of a GeochemDataset.
 
-    Attributes
-    ----------
-    name: str
-        Name of the elemental species analyzed.
-    unit: str
-        Unit of the measurement.
-    process: str
-        A description of the process by which the species was measured.
+    Elemental species names (e.g. SiO2) resolve to a `MeasurementValue` read
+    from the row of `GeochemDataset.values`. When a species was measured by
+    several processes, the value chosen by `GeochemDataset.reconciled` is
+    used.
     """
-    def __init__(self, element_string):
-        element_string_parts = element_string.split("_")
-        self.name = element_string_parts[0]
-        if element_string_parts[1] == "%":
-            self.unit = "percent"
-        else:
-            self.unit = element_string_parts[1]
-        for key, val in process_dict.items():
-            if key in element_string_parts[-1]:
-                self.process = val
+    __slots__ = ("_dataset", "_row")
 
-    def set_value(self, val):
-        self.value = val
+    def __init__(self, dataset: GeochemDataset, row: int):
+        self._dataset = dataset
+        self._row = row
+
+    def __getattr__(self, name: str) -> MeasurementValue:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        reconciled = self._dataset.reconciled
+        for analyte in reconciled.analytes_for(name):
+            col = reconciled.source_columns[self._row, analyte]
+            if col >= 0:
+                return self._dataset.schema.measurement_value(
+                    col, self._dataset.values[self._row, col]
+                )
+        raise AttributeError(
+            f"{type(self).__name__} has no measurement of {name}."
+        )
+
+    def _metadata(self, column: str):
+        return self._dataset.metadata_column(column).iat[self._row]
+
+    @property
+    def name(self):
+        return self._metadata("Sample")
 
 
-class GeochemSample:
+class GeochemSample(_MeasurementRow):
     """
     Stores data for one geochemical sample.
 
     Parameters
     ----------
-    measurement_objects: list[ElementalMeasurements]
-        List of ElementalMeasurement objects.
-    measurement_indices: np.ndarray
-        Array of indices corresponding elemental measurements in dataset array.
-    all_values: pd.Series
-        Dataset array with all data available.
+    dataset: GeochemDataset
+        Dataset that holds the values of this sample.
+    row: int
+        Row of the sample in `dataset.values`.
 
     Attributes
     ----------
@@ -83,45 +108,58 @@ class GeochemSample:
         Based on the number of measurements made on this sample. Attributes
         will correspond to elemental species name (e.g. SiO2).
     """
-    def __init__(
-        self,
-        measurement_objects: list[ElementalMeasurement],
-        measurement_indices: np.ndarray,
-        all_values: pd.Series
-    ):
-        measurement_values = all_values.iloc[measurement_indices]
-        for meas, val in zip(measurement_objects, measurement_values):
-            if not np.isnan(val):
-                meas.set_value(val)
-                setattr(self, meas.name, meas)
-
-        self._set_metadata(all_values)
-
-    def _set_metadata(self, all_values: pd.Series):
-        self.name = all_values.iloc[0]
-        self.geologic_series = all_values.iloc[2]
-        self.location = (all_values.iloc[3], all_values.iloc[4])
-        self.rock_class = all_values.iloc[6]
-        self.rock_type = all_values.iloc[7]
-        self.rock_name = all_values.iloc[8]
-        self.desc = all_values.iloc[9]
-        self.weight = all_values.iloc[10]
+    __slots__ = ()
 
-    def pull_data(self, element_type: str = "major"):
+    @property
+    def geologic_series(self):
+        return self._metadata("Series")
+
+    @property
+    def location(self):
+        return (self._metadata("Longitude"), self._metadata("Latitude"))
+
+    @property
+    def rock_class(self):
+        return self._metadata("Rock_Class")
+
+    @property
+    def rock_type(self):
+        return self._metadata("Rock_Type")
+
+    @property
+    def rock_name(self):
+        return self._metadata("Rock_Name")
+
+    @property
+    def desc(self):
+        return self._metadata("Description")
+
+    @property
+    def weight(self):
+        return self._metadata("Rcvd_Sample_Wt_kg")
+
+    def _pull(self, element_type: str):
+        # Element names, values and below-detection flags of one unit class.
         if element_type == "major":
             unit_case = "percent"
         elif element_type == "minor":
             unit_case = "ppm"
         else:
             raise ValueError("element_type not correct.")
-        elements = {}
-        for elem in self.__dict__.keys():
-            meas = getattr(self, elem)
-            if isinstance(meas, ElementalMeasurement):
-                if meas.unit == unit_case:
-                    elements[meas.name] = meas.value
+        reconciled = self._dataset.reconciled
+        analytes = np.flatnonzero(
+            (reconciled.units == unit_case) &
+            (reconciled.source_columns[self._row] >= 0)
+        )
+        return (
+            list(reconciled.names[analytes]),
+            reconciled.values[self._row, analytes],
+            reconciled.below_detection[self._row, analytes],
+        )
 
-        return elements
+    def pull_data(self, element_type: str = "major"):
+        names, values, _ = self._pull(element_type)
+        return dict(zip(names, values))
 
     def spider_plot(
         self,
@@ -142,18 +180,17 @@ class GeochemSample:
         else:
             ls = ""
 
-        element_subset_dict = self.pull_data(element_type)
-        num_subset = len(element_subset_dict)
+        names, elem_vals, below_detection = self._pull(element_type)
+        num_subset = len(names)
 
-        elem_vals = np.array(list(element_subset_dict.values()))
-        good_idx = elem_vals > 1
+        good_idx = ~below_detection
         elem_vals = elem_vals[good_idx]
         ax.plot(
             np.arange(num_subset)[good_idx],
             elem_vals,
             linestyle=ls, marker='o', **plot_kwargs
         )
-        ax.set_xticks(np.arange(num_subset), element_subset_dict.keys())
+        ax.set_xticks(np.arange(num_subset), names)
 
         ax.tick_params(axis='x', labelrotation=45)
         title_string = f"Sample: {self.name} ({self.rock_type} " \
@@ -161,108 +198,1095 @@ class GeochemSample:
         ax.set_title(title_string)
 
 
-class GeochemStandard:
+class GeochemStandard(_MeasurementRow):
     """
     Specialized GeochemSample-like class for standards.
 
     Parameters
     ----------
-    measurement_objects: list[ElementalMeasurements]
-        List of ElementalMeasurement objects.
-    measurement_indices: np.ndarray
-        Array of indices corresponding elemental measurements in dataset array.
-    all_values: pd.Series
-        Dataset array with all data available.
+    dataset: GeochemDataset
+        Dataset that holds the values of this standard.
+    row: int
+        Row of the standard in `dataset.values`.
     """
-    def __init__(
-        self,
-        measurement_objects: list[ElementalMeasurement],
-        measurement_indices: np.ndarray,
-        all_values: pd.Series
-    ):
-        measurement_values = all_values.iloc[measurement_indices]
-        for meas, val in zip(measurement_objects, measurement_values):
-            if not np.isnan(val):
-                meas.set_value(val)
-                setattr(self, meas.name, meas)
-
-        self.name = all_values.iloc[0]
+    __slots__ = ()
 
 
 class GeochemDataset:
     """
     Easy access to a geochemical dataset in an excel file.
 
+    The header is parsed once and every elemental measurement is stored in a
+    single 2-D float array. Sample and standard objects are light views into
+    that array and are only created when `samples` or `standards` is first
+    accessed.
+
     Parameters
     ----------
     dataset: Path-like or pd.DataFrame
         Either a path to an excel file or a DataFrame corresponding to the
         geochemical data you would like to visualize or analyze.
+    cache_dir: Path-like, optional
+        Directory for an on-disk binary cache of the parsed dataset. Only
+        used when `dataset` is a path. Repeat loads of an unchanged file read
+        the cache (with `values` memory-mapped) instead of the csv. Default
+        is None, which disables caching.
+    compact: bool, optional
+        Load in the memory-optimized layout of `compact`. Default is False.
 
     Attributes
     ----------
+    schema: MeasurementSchema
+        Name, unit and process of every measurement column.
+    values: np.ndarray
+        Array of shape (rows, measurements) with every measured value.
+    metadata: pd.DataFrame
+        All non-measurement columns of the dataset (one row per row of
+        `values`).
+    below_detection: np.ndarray
+        Boolean array, True where a value is below the detection limit
+        (reported as the negative of the limit).
+    not_analyzed: np.ndarray
+        Boolean array, True where no measurement was made.
+    standard_mask: np.ndarray
+        Boolean mask over the rows of `values` that are standards.
     samples: list[GeochemSample]
         List of geochemical samples in the dataset.
+    standards: list[GeochemStandard]
+        List of geochemical standards in the dataset.
     """
-    def __init__(self, dataset):
+    def __init__(self, dataset, cache_dir=None, compact: bool = False):
         if (type(dataset) is str) | isinstance(dataset, Path):
-            dataset = pd.read_csv(dataset, index_col=0)
+            header, values, metadata = load_dataset_file(dataset, cache_dir)
         elif type(dataset) is pd.DataFrame:
-            pass
+            header, values, metadata = split_dataset_frame(dataset)
         else:
             raise ValueError(f"Invalid dataset type: {type(dataset)}.")
 
-        self.samples = []
-        self.standards = []
+        self._set_data(header, values, metadata)
+        if not isinstance(dataset, pd.DataFrame):
+            self._source = Path(dataset)
+            self._source_size = self._source.stat().st_size
+            self._source_rows = len(metadata)
+        if compact:
+            self.compact()
+
+    def _set_data(
+        self, header: list[str], values: np.ndarray, metadata: pd.DataFrame
+    ):
+        self.schema = parse_measurement_schema(header)
+        self.values = values
+        self.below_detection, self.not_analyzed = \
+            flag_detection_limits(values)
+        self.metadata = metadata
+        self.standard_mask = (metadata["Rock_Class"] == "Standard").to_numpy()
+
+        self._samples = None
+        self._standards = None
+        self._index = None
+        self._spatial = None
+        self._reconciled = {}
+        self._normalized = {}
+        self._aggregates = {}
+        self._buffers = None
+        self._source = None
+        self._source_size = 0
+        self._source_rows = 0
+        self._lazy_columns = {}
+
+    def _header(self) -> list[str]:
+        # Full header: the metadata columns with the measurement columns
+        # back at their original positions.
+        header = list(self.metadata.columns)
+        for idx, col in zip(self.schema.indices, self.schema.columns):
+            header.insert(idx, col)
+        return header
+
+    def append(self, data) -> np.ndarray:
+        """
+        Adds the rows of a DataFrame or csv file (e.g. a new lab report) to
+        the end of the dataset without re-parsing the existing rows.
+
+        Rows are written into buffers that grow geometrically, so appending
+        costs time proportional to the new rows. Built indexes and cached
+        results are extended with the new rows; cached aggregates are only
+        recomputed for the groups the new rows fall in. Classification
+        columns (see `classify`) are missing for the new rows until
+        `classify` is run again.
+
+        Parameters
+        ----------
+        data: pd.DataFrame or Path-like
+            Geochemical data in the layout of the source csv files. New
+            measurement columns are added to the schema (which drops every
+            cached result).
+
+        Returns
+        -------
+        rows: np.ndarray
+            Rows of the dataset holding the new data.
+        """
+        if isinstance(data, pd.DataFrame):
+            header, values, metadata = split_dataset_frame(data)
+        elif isinstance(data, (str, Path)):
+            header, values, metadata = load_dataset_file(data)
+        else:
+            raise ValueError(f"Invalid dataset type: {type(data)}.")
+        return self._append(header, values, metadata)
+
+    def update(self) -> np.ndarray:
+        """
+        Appends the rows written to the end of the source csv file since it
+        was loaded (or last updated). Only the new bytes are parsed.
+
+        Returns
+        -------
+        rows: np.ndarray
+            Rows of the dataset holding the new data.
+        """
+        if self._source is None:
+            raise ValueError("The dataset was not loaded from a file.")
+        size = self._source.stat().st_size
+        if size < self._source_size:
+            raise ValueError(
+                f"{self._source} is smaller than when it was loaded. Load it "
+                "again instead."
+            )
+        if size == self._source_size:
+            return np.zeros(0, dtype=np.int64)
+
+        with open(self._source, "rb") as f:
+            header_line = f.readline()
+            f.seek(self._source_size - 1)
+            previous = f.read(1)
+            tail = f.read(size - self._source_size)
+        if previous not in (b"\n", b"\r") and \
+           not tail.startswith((b"\n", b"\r")):
+            raise ValueError(
+                f"The last row of {self._source} changed since it was "
+                "loaded. Load it again instead."
+            )
+        rows = self.append(
+            pd.read_csv(io.BytesIO(header_line + tail), index_col=0)
+        )
+        self._source_size = size
+        self._source_rows += len(rows)
+        return rows
+
+    def _append(
+        self, header: list[str], values: np.ndarray, metadata: pd.DataFrame
+    ) -> np.ndarray:
+        self._load_lazy_columns()
+        schema = parse_measurement_schema(header)
+
+        # Everything that depends on the new metadata is prepared before any
+        # state changes, so a bad report leaves the dataset as it was.
+        # Columns the report lacks are NaN in the merged metadata: such rows
+        # are not standards and have no location.
+        start = self.values.shape[0]
+        merged = pd.concat([self.metadata, metadata])
+        for col, dtype in self.metadata.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and \
+               not isinstance(merged[col].dtype, pd.CategoricalDtype):
+                labels = metadata[col].dropna().unique() \
+                    if col in metadata.columns else []
+                merged[col] = pd.Categorical(
+                    merged[col],
+                    categories=dtype.categories.union(labels, sort=False),
+                )
+        new_standards = (
+            merged["Rock_Class"].iloc[start:] == "Standard"
+        ).to_numpy(dtype=bool)
+        if self._spatial is not None:
+            location = [
+                pd.to_numeric(merged[col].iloc[start:], errors="coerce")
+                if col in merged.columns
+                else np.full(len(metadata), np.nan)
+                for col in ("Longitude", "Latitude")
+            ]
+
+        new_columns = [
+            i for i in schema.columns if i not in self.schema.column_index
+        ]
+        if new_columns:
+            self._add_measurement_columns(new_columns)
+        cols = [self.schema.column_index[i] for i in schema.columns]
+
+        block = np.full((values.shape[0], len(self.schema)), np.nan)
+        block[:, cols] = values
+        below, not_analyzed = flag_detection_limits(block)
+
+        stop = start + block.shape[0]
+        self._reserve(stop)
+        for buffer, new in zip(self._buffers, (block, below, not_analyzed)):
+            buffer[start:stop] = new
+        self.values, self.below_detection, self.not_analyzed = [
+            i[:stop] for i in self._buffers
+        ]
+
+        self.metadata = merged
+        self.standard_mask = np.concatenate(
+            [self.standard_mask, new_standards]
+        )
+        rows = np.arange(start, stop)
+
+        if self._samples is not None:
+            self._samples.extend(
+                GeochemSample(self, i) for i in rows[~new_standards]
+            )
+        if self._standards is not None:
+            self._standards.extend(
+                GeochemStandard(self, i) for i in rows[new_standards]
+            )
+        if self._index is not None:
+            self._index.extend(self.metadata)
+        if self._spatial is not None:
+            self._spatial.extend(*location)
 
-        for row in range(dataset.shape[0]):
-            em_list, meas_idx = parse_elemental_measurements(
-                list(dataset.columns)
+        reconciled = {}
+        for priority, cached in self._reconciled.items():
+            reconciled[priority] = reconcile_measurements(
+                block,
+                below,
+                self.schema.names,
+                self.schema.units,
+                self.schema.process_codes,
+                priority,
             )
-            if dataset.iloc[row, 6] == "Standard":
-                standard = GeochemStandard(
-                    em_list,
-                    meas_idx,
-                    dataset.iloc[row]
+            cached.append(reconciled[priority])
+        if self._normalized:
+            new = reconciled.get(default_method_priority)
+            if new is None:
+                new = reconcile_measurements(
+                    block,
+                    below,
+                    self.schema.names,
+                    self.schema.units,
+                    self.schema.process_codes,
                 )
-                self.standards.append(standard)
+            for key, (elements, normalized) in self._normalized.items():
+                self._normalized[key] = (elements, np.concatenate(
+                    [normalized, _normalize_reconciled(new, *key)[1]]
+                ))
+        self._refresh_aggregates(rows)
+        return rows
+
+    def _reserve(self, nrows: int):
+        # Makes room for `nrows` rows in the buffers behind `values` and the
+        # detection flags. Capacity grows by half each time, so a row is
+        # copied a constant number of times on average.
+        current = (self.values, self.below_detection, self.not_analyzed)
+        capacity = 0 if self._buffers is None else len(self._buffers[0])
+        if nrows <= capacity:
+            return
+        capacity = max(nrows, self.values.shape[0] * 3 // 2)
+        buffers = []
+        for array in current:
+            buffer = np.empty((capacity, array.shape[1]), dtype=array.dtype)
+            buffer[:array.shape[0]] = array
+            buffers.append(buffer)
+        self._buffers = buffers
+
+    def _add_measurement_columns(self, columns: list[str]):
+        # Adds measurement columns, not analyzed in any existing row, after
+        # the current ones. Cached results no longer match the schema.
+        self.schema = parse_measurement_schema(self._header() + columns)
+        nrows = self.values.shape[0]
+        width = (nrows, len(columns))
+        self.values = np.hstack(
+            [self.values, np.full(width, np.nan, dtype=self.values.dtype)]
+        )
+        self.below_detection = np.hstack(
+            [self.below_detection, np.zeros(width, dtype=bool)]
+        )
+        self.not_analyzed = np.hstack(
+            [self.not_analyzed, np.ones(width, dtype=bool)]
+        )
+        self._buffers = None
+        self._reconciled = {}
+        self._normalized = {}
+        self._aggregates = {}
+
+    def compact(
+        self,
+        category_ratio: float = 0.5,
+        lazy_columns: tuple[str, ...] = ("Description",)
+    ):
+        """
+        Converts the dataset in place to a memory-optimized layout.
+
+        - `values` is stored as float32 if every value survives the cast
+          without overflow or loss of significant digits (float32 keeps
+          about 7, more than labs report).
+        - Text metadata columns with many repeated labels (e.g. Datum,
+          Rock_Class, Report) become categoricals, storing each label once.
+        - Free-text columns in `lazy_columns` are dropped from memory and
+          re-read from the source csv the first time they are accessed
+          through `metadata_column`. This only applies when every row came
+          from the source file (loaded or added by `update`); rows added by
+          `append` cannot be re-read, so the columns then stay in memory.
+
+        Cached results are cleared.
+
+        Parameters
+        ----------
+        category_ratio: float, optional
+            Text columns with fewer distinct labels than this fraction of the
+            rows are made categorical. Default is 0.5.
+        lazy_columns: tuple[str, ...], optional
+            Metadata columns to keep on disk. Default is ("Description",).
+        """
+        if self.values.dtype != np.float32 and fits_float32(self.values):
+            self.values = self.values.astype(np.float32)
+
+        metadata = self.metadata.copy()
+        if self._source is not None and \
+           self._source_rows == len(metadata):
+            for col in lazy_columns:
+                if col in metadata.columns and col not in self._lazy_columns:
+                    self._lazy_columns[col] = metadata.columns.get_loc(col)
+                    metadata = metadata.drop(columns=col)
+        for col in metadata.columns:
+            column = metadata[col]
+            if pd.api.types.is_numeric_dtype(column) or \
+               isinstance(column.dtype, pd.CategoricalDtype):
+                continue
+            if column.nunique() < category_ratio * len(column):
+                metadata[col] = column.astype("category")
+        self.metadata = metadata
+
+        self._buffers = None
+        self._index = None
+        self._reconciled = {}
+        self._normalized = {}
+        self._aggregates = {}
+
+    def metadata_column(self, column: str) -> pd.Series:
+        """
+        One metadata column, read from the source file first if `compact`
+        left it on disk.
+        """
+        if column in self._lazy_columns:
+            self._load_lazy_columns()
+        return self.metadata[column]
+
+    def _load_lazy_columns(self):
+        # Reads every column `compact` left on disk back into `metadata`.
+        if not self._lazy_columns:
+            return
+        if self._source.stat().st_size < self._source_size:
+            raise ValueError(
+                f"{self._source} changed since it was loaded. Load it again "
+                "instead."
+            )
+        columns = pd.read_csv(
+            self._source,
+            usecols=list(self._lazy_columns),
+            nrows=self._source_rows,
+        )
+        metadata = self.metadata.copy()
+        for col, loc in sorted(self._lazy_columns.items(), key=lambda i: i[1]):
+            metadata.insert(loc, col, columns[col].to_numpy())
+        self.metadata = metadata
+        self._lazy_columns = {}
+        if self._index is not None:
+            self._index._metadata = metadata
+
+    def memory_usage(self) -> pd.Series:
+        """
+        Bytes held in memory by each part of the dataset.
+
+        Returns
+        -------
+        usage: pd.Series
+            Bytes of the measurement arrays (including spare buffer rows),
+            metadata, and cached reconciled, normalized and aggregated
+            results, plus their total. A memory-mapped `values` array is
+            counted at its full size although it stays on disk.
+        """
+        if self._buffers is not None:
+            arrays = self._buffers
+        else:
+            arrays = (self.values, self.below_detection, self.not_analyzed)
+        reconciled = sum(
+            sum(
+                getattr(i, field).nbytes for field in (
+                    "source_columns", "provenance", "values",
+                    "below_detection",
+                )
+            )
+            for i in self._reconciled.values()
+        )
+        usage = pd.Series({
+            "values": arrays[0].nbytes,
+            "below_detection": arrays[1].nbytes,
+            "not_analyzed": arrays[2].nbytes,
+            "metadata": int(self.metadata.memory_usage(deep=True).sum()),
+            "reconciled": reconciled,
+            "normalized": sum(
+                i[1].nbytes for i in self._normalized.values()
+            ),
+            "aggregates": sum(
+                int(i.memory_usage(deep=True).sum())
+                for i in self._aggregates.values()
+            ),
+        })
+        usage["total"] = usage.sum()
+        return usage
+
+    @classmethod
+    def iter_chunks(cls, path, chunksize: int = 10000):
+        """
+        Reads a geochemical csv file in fixed-size chunks.
+
+        Only one chunk is held in memory at a time, so files larger than the
+        available memory can be processed.
+
+        Parameters
+        ----------
+        path: Path-like
+            Path to the csv file.
+        chunksize: int, optional
+            Number of rows per chunk. Default is 10000.
+
+        Yields
+        ------
+        chunk: GeochemDataset
+            Dataset holding the next `chunksize` rows of the file.
+        """
+        with pd.read_csv(path, index_col=0, chunksize=chunksize) as reader:
+            for frame in reader:
+                yield cls(frame)
+
+    @classmethod
+    def from_files(cls, paths, workers: int | None = None, cache_dir=None):
+        """
+        Builds one dataset from several geochemical csv files (e.g. one file
+        per lab report), parsing the files in parallel.
+
+        Files with different column layouts are merged into the union of
+        their columns; measurements a file does not have are NaN.
+
+        Parameters
+        ----------
+        paths: list[Path-like]
+            Paths to the csv files. Rows are kept in the order of `paths`.
+        workers: int, optional
+            Number of worker processes. Default is None, which uses one per
+            CPU. With 1, files are parsed in this process.
+        cache_dir: Path-like, optional
+            Directory for the on-disk cache of each parsed file (see
+            `GeochemDataset`). Default is None, which disables caching.
+
+        Returns
+        -------
+        dataset: GeochemDataset
+            Dataset holding the rows of every file.
+        """
+        paths = list(paths)
+        if workers == 1 or len(paths) < 2:
+            parts = [load_dataset_file(i, cache_dir) for i in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(
+                    load_dataset_file, paths, [cache_dir] * len(paths)
+                ))
+        if not parts:
+            raise ValueError("No files to load.")
+
+        metadata_columns = {}
+        measurement_columns = {}
+        for header, _, metadata in parts:
+            for col in metadata.columns:
+                metadata_columns.setdefault(col, None)
+            for col in parse_measurement_schema(header).columns:
+                measurement_columns.setdefault(col, len(measurement_columns))
+        header = list(metadata_columns) + list(measurement_columns)
+
+        # Every file's block is copied once, straight into its place in the
+        # merged array.
+        nrows = sum(part[1].shape[0] for part in parts)
+        values = np.full((nrows, len(measurement_columns)), np.nan)
+        start = 0
+        for part_header, part_values, _ in parts:
+            stop = start + part_values.shape[0]
+            cols = [
+                measurement_columns[i]
+                for i in parse_measurement_schema(part_header).columns
+            ]
+            values[start:stop, cols] = part_values
+            start = stop
+        metadata = pd.concat(
+            [part[2] for part in parts]
+        ).reindex(columns=list(metadata_columns))
+
+        dataset = cls.__new__(cls)
+        dataset._set_data(header, values, metadata)
+        return dataset
+
+    def substituted_values(self, rule: str | float = "half") -> np.ndarray:
+        """
+        Measurement array with below-detection results replaced.
+
+        Parameters
+        ----------
+        rule: str or float, optional
+            One of "half" (DL/2), "limit" (DL), "zero" or "nan", or the
+            factor of the detection limit to use. Default is "half".
+
+        Returns
+        -------
+        values: np.ndarray
+            Copy of `values`; cells that were not analyzed stay NaN.
+        """
+        return substitute_below_detection(
+            self.values, self.below_detection, rule
+        )
+
+    def reconcile(
+        self, priority: tuple[str, ...] = default_method_priority
+    ) -> ReconciledMeasurements:
+        """
+        One best value per analyte for every row, chosen across the methods
+        that measured it (e.g. SiO2 by XRF26 and ICP06).
+
+        Results are cached per priority order.
+
+        Parameters
+        ----------
+        priority: tuple[str, ...], optional
+            Process codes (keys of `process_dict`) from most to least
+            preferred. Default is `default_method_priority`.
+
+        Returns
+        -------
+        reconciled: ReconciledMeasurements
+            Best-value matrix and per-cell provenance.
+        """
+        priority = tuple(priority)
+        if priority not in self._reconciled:
+            self._reconciled[priority] = reconcile_measurements(
+                self.values,
+                self.below_detection,
+                self.schema.names,
+                self.schema.units,
+                self.schema.process_codes,
+                priority,
+            )
+        return self._reconciled[priority]
+
+    @property
+    def reconciled(self) -> ReconciledMeasurements:
+        """
+        `reconcile` with the default method priority.
+        """
+        return self.reconcile()
+
+    def spider_plot(
+        self,
+        ax,
+        element_type: str = "major",
+        rows: np.ndarray | None = None,
+        show_line: bool = True,
+        color=None,
+        alpha: float | None = None,
+        reference: str | None = None,
+        order: str = "ree",
+        **line_kwargs
+    ):
+        """
+        Make a spider plot of many samples at once.
+
+        The (samples x elements) block is pulled from `reconciled` in one
+        step and every sample is drawn into a single LineCollection, with the
+        markers in a single scatter, so drawing time barely grows with the
+        number of samples. Below-detection values are left out.
+
+        Parameters
+        ----------
+        ax: Axis
+            Matplotlib axis to plot into.
+        element_type: str, optional
+            Either "major" or "minor". Default is "major".
+        rows: np.ndarray, optional
+            Rows to plot, e.g. from `select`. Default is None, which plots
+            every sample.
+        show_line: bool, optional
+            Toggles the lines between the points of each sample.
+        color, alpha: optional
+            Color and transparency of lines and markers.
+        reference: str, optional
+            Plot ppm values normalized to this reference composition (see
+            `normalized`) instead of raw values. `element_type` is then
+            ignored. Default is None.
+        order: str, optional
+            Element order of normalized plots, "ree" or "spider". Default is
+            "ree".
+        **line_kwargs
+            Passed to the LineCollection.
+
+        Returns
+        -------
+        lines: LineCollection
+            The artist holding the lines.
+        """
+        from matplotlib.collections import LineCollection
+
+        if rows is None:
+            rows = np.flatnonzero(~self.standard_mask)
+
+        if reference is not None:
+            names, normalized = self.normalized(reference, order)
+            block = normalized[rows]
+            good = ~np.isnan(block)
+        else:
+            if element_type == "major":
+                unit_case = "percent"
+            elif element_type == "minor":
+                unit_case = "ppm"
             else:
-                samp = GeochemSample(
-                    em_list,
-                    meas_idx,
-                    dataset.iloc[row]
+                raise ValueError(
+                    f"{element_type} is an invalid element type."
                 )
-                self.samples.append(samp)
+            # Elements measured anywhere in the dataset, so repeated calls
+            # (one per group) share the same x positions.
+            reconciled = self.reconciled
+            analytes = np.flatnonzero(
+                (reconciled.units == unit_case) &
+                (reconciled.source_columns >= 0).any(axis=0)
+            )
+            names = reconciled.names[analytes]
+            block = reconciled.values[np.ix_(rows, analytes)]
+            good = ~np.isnan(block) & \
+                ~reconciled.below_detection[np.ix_(rows, analytes)]
+
+        if color is None:
+            # One color from the axes cycle for both lines and markers, as
+            # `ax.plot` would pick.
+            color = ax._get_lines.get_next_color()
+
+        x = np.arange(len(names), dtype=float)
+        segments = [
+            np.column_stack((x[mask], vals[mask]))
+            for vals, mask in zip(block, good)
+        ]
+        lines = LineCollection(
+            segments,
+            colors=color,
+            alpha=alpha,
+            linestyles="-" if show_line else "None",
+            **line_kwargs
+        )
+        ax.add_collection(lines)
+        row_idx, col_idx = np.nonzero(good)
+        ax.scatter(x[col_idx], block[row_idx, col_idx], color=color,
+                   alpha=alpha, marker="o")
+
+        ax.set_xticks(x, names)
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.autoscale_view()
+        return lines
+
+    def normalized(
+        self, reference: str = "chondrite", order: str = "ree"
+    ) -> tuple[tuple[str, ...], np.ndarray]:
+        """
+        Reconciled ppm values divided by a reference composition.
+
+        The whole ppm block is normalized in one broadcast division and the
+        result is cached per (reference, order). Below-detection values are
+        NaN.
+
+        Parameters
+        ----------
+        reference: str, optional
+            One of "chondrite", "primitive_mantle" or "morb". Default is
+            "chondrite".
+        order: str, optional
+            Element order, either "ree" (La-Lu) or "spider" (multi-element).
+            Default is "ree".
+
+        Returns
+        -------
+        elements: tuple[str, ...]
+            Elements of the normalized columns, in `order`.
+        normalized: np.ndarray
+            Array of shape (rows, elements) of sample/reference ratios.
+        """
+        key = (reference, order)
+        if key not in self._normalized:
+            self._normalized[key] = _normalize_reconciled(
+                self.reconciled, reference, order
+            )
+        return self._normalized[key]
+
+    def classify(
+        self,
+        scheme: str = "tas",
+        column: str | None = None,
+        anhydrous: bool = True
+    ) -> pd.Categorical:
+        """
+        Classifies every row at once and stores the result as a categorical
+        column of `metadata`.
+
+        Parameters
+        ----------
+        scheme: str, optional
+            "tas" for the total-alkali-silica diagram or "silica" for SiO2
+            binning (Basalt < 50 <= Dacite < 70 <= Rhyolite). Default is
+            "tas".
+        column: str, optional
+            Metadata column to write. Default is None, which uses "TAS" or
+            "SiO2_Class".
+        anhydrous: bool, optional
+            Recalculate the major oxides to 100% volatile-free before
+            classifying. Default is True.
+
+        Returns
+        -------
+        rock_types: pd.Categorical
+            Class of each row (missing where it could not be classified).
+        """
+        reconciled = self.reconciled
+
+        def oxide(name):
+            for analyte in reconciled.analytes_for(name):
+                if reconciled.units[analyte] == "percent":
+                    return np.where(
+                        reconciled.below_detection[:, analyte],
+                        0.0,
+                        reconciled.values[:, analyte],
+                    )
+            return np.full(len(self.metadata), np.nan)
+
+        scale = np.ones(len(self.metadata))
+        if anhydrous:
+            total = np.nansum(
+                [oxide(i) for i in major_oxides], axis=0
+            )
+            with np.errstate(invalid="ignore", divide="ignore"):
+                scale = np.where(total > 0, 100 / total, np.nan)
+
+        sio2 = oxide("SiO2") * scale
+        if scheme == "tas":
+            alkalis = (oxide("Na2O") + oxide("K2O")) * scale
+            rock_types = classify_tas(sio2, alkalis)
+            categories = list(tas_fields)
+        elif scheme == "silica":
+            rock_types = classify_silica(sio2)
+            categories = ["Basalt", "Dacite", "Rhyolite"]
+        else:
+            raise ValueError(f"{scheme} is an invalid classification scheme.")
+
+        if column is None:
+            column = "TAS" if scheme == "tas" else "SiO2_Class"
+        rock_types = pd.Categorical(rock_types, categories=categories)
+        self.metadata[column] = rock_types
+        self._invalidate_aggregates(by=column)
+        return rock_types
+
+    def groupby(
+        self, by: str, include_standards: bool = False
+    ) -> GroupedDataset:
+        """
+        Groups the rows by a metadata column for aggregation, e.g.
+        gd.groupby("Rock_Name").agg(["mean", "p90"], elements=["SiO2"]).
+
+        Parameters
+        ----------
+        by: str
+            Metadata column to group by.
+        include_standards: bool, optional
+            Whether standards are included. Default is False.
+
+        Returns
+        -------
+        grouped: GroupedDataset
+            Grouping with an `agg` method.
+        """
+        return GroupedDataset(self, by, include_standards=include_standards)
+
+    def qc(self, certified=None, target_rsd: float = 0.05) -> StandardsQC:
+        """
+        Recovery, z-scores and drift of the standards against certified
+        values, e.g. gd.qc().report_flags(z_limit=2).
+
+        Parameters
+        ----------
+        certified: dict or pd.DataFrame, optional
+            Certified values per standard and element name, extending the
+            built-in USGS table. Default is None.
+        target_rsd: float, optional
+            Relative standard deviation used to scale z-scores. Default is
+            0.05.
+
+        Returns
+        -------
+        qc: StandardsQC
+            Standard checks of this dataset.
+        """
+        return StandardsQC(self, certified=certified, target_rsd=target_rsd)
+
+    def _cached_aggregate(self, key: tuple, compute) -> pd.DataFrame:
+        if key not in self._aggregates:
+            self._aggregates[key] = compute()
+        return self._aggregates[key]
+
+    def _refresh_aggregates(self, rows: np.ndarray):
+        # Recomputes cached aggregates for the groups that gained `rows`;
+        # the other groups keep their cached results.
+        for key, cached in list(self._aggregates.items()):
+            by, include_standards = key[0], key[5]
+            grouped_rows = rows
+            if not include_standards:
+                grouped_rows = rows[~self.standard_mask[rows]]
+            labels = self.metadata[by].iloc[grouped_rows].dropna().unique()
+            if len(labels) == 0:
+                continue
+            grouped = GroupedDataset(self, by, include_standards)
+            refreshed = grouped._compute(*key[1:5], groups=labels)
+            self._aggregates[key] = pd.concat([
+                cached.drop(refreshed.index, errors="ignore"), refreshed
+            ]).sort_index()
+
+    def _invalidate_aggregates(self, by: str | None = None):
+        # Drops cached aggregates, or only those grouped by `by`.
+        if by is None:
+            self._aggregates.clear()
+        else:
+            for key in [i for i in self._aggregates if i[0] == by]:
+                del self._aggregates[key]
+
+    def masked_values(self) -> np.ma.MaskedArray:
+        """
+        Measurement array with below-detection and not-analyzed cells masked.
+        """
+        return np.ma.MaskedArray(
+            self.values, mask=self.below_detection | self.not_analyzed
+        )
+
+    @property
+    def column_index(self) -> dict[str, int]:
+        """
+        Maps each measurement column name to its column in `values`.
+        """
+        return self.schema.column_index
+
+    @property
+    def samples(self) -> list[GeochemSample]:
+        if self._samples is None:
+            self._samples = [
+                GeochemSample(self, row)
+                for row in np.flatnonzero(~self.standard_mask)
+            ]
+        return self._samples
+
+    @property
+    def standards(self) -> list[GeochemStandard]:
+        if self._standards is None:
+            self._standards = [
+                GeochemStandard(self, row)
+                for row in np.flatnonzero(self.standard_mask)
+            ]
+        return self._standards
+
+    @property
+    def index(self) -> DatasetIndex:
+        """
+        Categorical indexes over the dataset metadata, used by `select`.
+        """
+        if self._index is None:
+            self._index = DatasetIndex(self.metadata)
+        return self._index
+
+    @property
+    def spatial(self) -> SpatialIndex:
+        """
+        Grid index over the sample locations, with `bbox`, `radius` and
+        `nearest` queries that return rows of the dataset.
+        """
+        if self._spatial is None:
+            self._spatial = SpatialIndex(
+                pd.to_numeric(self.metadata["Longitude"], errors="coerce"),
+                pd.to_numeric(self.metadata["Latitude"], errors="coerce"),
+            )
+        return self._spatial
+
+    def select(
+        self,
+        contains: bool = False,
+        include_standards: bool = True,
+        **criteria
+    ) -> np.ndarray:
+        """
+        Finds the rows of the dataset matching every criterion.
+
+        Parameters
+        ----------
+        contains: bool, optional
+            Match labels that contain the given value as a substring instead
+            of exact matches. Default is False.
+        include_standards: bool, optional
+            Whether standards can be selected. Default is True.
+        **criteria
+            Any of rock_class, rock_type, rock_name, series, report or sample,
+            set to a label or a list of labels. For example:
+            gd.select(rock_name="granite", series="LC")
+
+        Returns
+        -------
+        rows: np.ndarray
+            Sorted rows of `values` (and `metadata`) that match.
+        """
+        rows = self.index.select(contains=contains, **criteria)
+        if not include_standards:
+            rows = rows[~self.standard_mask[rows]]
+        return rows
+
+    def subset(self, rows: np.ndarray) -> GeochemDataset:
+        """
+        New dataset holding only the given rows.
+
+        Parameters
+        ----------
+        rows: np.ndarray
+            Rows to keep, e.g. the output of `select`.
+
+        Returns
+        -------
+        dataset: GeochemDataset
+            Dataset with the same schema and the selected rows.
+        """
+        self._load_lazy_columns()
+        dataset = type(self).__new__(type(self))
+        dataset._set_data(
+            self._header(), self.values[rows], self.metadata.iloc[rows]
+        )
+        return dataset
+
+    def get_sample(self, name: str) -> GeochemSample | GeochemStandard:
+        """
+        Looks up a sample (or standard) by its name.
+
+        Parameters
+        ----------
+        name: str
+            Sample name, e.g. "13ATe301a".
+
+        Returns
+        -------
+        sample: GeochemSample or GeochemStandard
+            First row with this name.
+        """
+        rows = self.select(sample=name)
+        if len(rows) == 0:
+            raise KeyError(f"No sample named {name}.")
+        if self.standard_mask[rows[0]]:
+            return GeochemStandard(self, rows[0])
+        return GeochemSample(self, rows[0])
 
 
-def parse_elemental_measurements(
-    column_names: list[str]
-) -> tuple[list[ElementalMeasurement], np.ndarray]:
+def load_dataset_file(
+    path, cache_dir=None
+) -> tuple[list[str], np.ndarray, pd.DataFrame]:
     """
-    Parses through columns names of the dataset to find elemental measurements.
+    Reads a geochemical csv file, going through the on-disk cache if
+    `cache_dir` is given.
 
     Parameters
     ----------
-    column_names: list[str]
-        List of colummn name strings.
+    path: Path-like
+        Path to the csv file.
+    cache_dir: Path-like, optional
+        Directory for the on-disk cache. Default is None, which disables
+        caching.
 
     Returns
     -------
-    elemental_measurements: list[ElementalMeasurements]
-        List of elemental measurement objects.
-    measurement_indices: np.ndarray
-        Array of indices that correspond to measurement values.
+    header, values, metadata
+        See `split_dataset_frame`.
+    """
+    if cache_dir is not None:
+        # Keyed on the file as it was before reading, so changes made while
+        # parsing give a new key and are picked up on the next load.
+        key = cache_key(path)
+        cached = load_cached_dataset(path, cache_dir, key)
+        if cached is not None:
+            return cached
+    header, values, metadata = split_dataset_frame(
+        pd.read_csv(path, index_col=0)
+    )
+    if cache_dir is not None:
+        store_cached_dataset(
+            path, cache_dir, header, values, metadata, key=key
+        )
+    return header, values, metadata
+
+
+def split_dataset_frame(
+    dataset: pd.DataFrame
+) -> tuple[list[str], np.ndarray, pd.DataFrame]:
     """
-    elemental_measurements = []
-    measurement_indices = []
-    for idx, i in enumerate(column_names):
-        if len(findall("_", i)) > 1 and \
-           ("LOI" not in i) and \
-           ("Total" not in i) and \
-           ("Rcvd" not in i):
-            elemental_measurements.append(ElementalMeasurement(i))
-            measurement_indices.append(idx)
-    return elemental_measurements, np.array(measurement_indices)
+    Splits a geochemical DataFrame into its measurements and metadata.
+
+    Parameters
+    ----------
+    dataset: pd.DataFrame
+        Geochemical data, one row per sample or standard.
+
+    Returns
+    -------
+    header: list[str]
+        Full header of `dataset`.
+    values: np.ndarray
+        Array of shape (rows, measurements) with every measured value.
+    metadata: pd.DataFrame
+        All non-measurement columns of `dataset`.
+    """
+    header = list(dataset.columns)
+    schema = parse_measurement_schema(header)
+    measurement_frame = dataset.iloc[:, schema.indices]
+    values = np.empty(measurement_frame.shape)
+    for n, (_, column) in enumerate(measurement_frame.items()):
+        # Only text columns (e.g. holding "<0.01") need coercing.
+        if pd.api.types.is_numeric_dtype(column):
+            values[:, n] = column.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values[:, n] = pd.to_numeric(column, errors="coerce")
+    metadata = dataset.drop(columns=list(schema.columns))
+    return header, values, metadata
+
+
+def fits_float32(values: np.ndarray, significant: int = 6) -> bool:
+    """
+    Whether every value of `values` survives a cast to float32, i.e. stays
+    within range and keeps `significant` significant digits.
+    """
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return True
+    if np.abs(finite).max() > np.finfo(np.float32).max:
+        return False
+    nonzero = finite[finite != 0]
+    error = np.abs(nonzero.astype(np.float32) - nonzero) / np.abs(nonzero)
+    return bool((error <= 0.5 * 10.0**(1 - significant)).all())
+
+
+def _normalize_reconciled(
+    reconciled: ReconciledMeasurements, reference: str, order: str
+) -> tuple[tuple[str, ...], np.ndarray]:
+    """
+    Normalizes the ppm analytes of reconciled measurements, with
+    below-detection values set to NaN. See `GeochemDataset.normalized`.
+    """
+    ppm = np.flatnonzero(reconciled.units == "ppm")
+    values = np.where(
+        reconciled.below_detection[:, ppm],
+        np.nan,
+        reconciled.values[:, ppm],
+    )
+    return normalize(values, reconciled.names[ppm], reference, order)
 
 
 def compare_rock_types(
@@ -286,19 +1310,25 @@ def compare_rock_types(
     logscale: bool, optional
         Toggles whether or not to have the y-axis be in log units.
     """
-    for sample in gd.samples:
-        if "granite" in sample.rock_name:
-            sample.spider_plot(
-                ax, element_type=element_type, color="black", alpha=0.6
-            )
-        elif "ultramafic" in sample.rock_name:
-            sample.spider_plot(
-                ax, element_type=element_type, color="red", alpha=0.6
-            )
-        elif "intermediate" in sample.rock_name:
-            sample.spider_plot(
-                ax, element_type=element_type, color="orange", alpha=0.6
-            )
+    from matplotlib.lines import Line2D
+
+    granites = gd.select(
+        rock_name="granite", contains=True, include_standards=False
+    )
+    ultramafics = np.setdiff1d(gd.select(
+        rock_name="ultramafic", contains=True, include_standards=False
+    ), granites)
+    intermediates = np.setdiff1d(gd.select(
+        rock_name="intermediate", contains=True, include_standards=False
+    ), np.union1d(granites, ultramafics))
+    for rows, color in [
+        (granites, "black"),
+        (ultramafics, "red"),
+        (intermediates, "orange"),
+    ]:
+        gd.spider_plot(
+            ax, element_type=element_type, rows=rows, color=color, alpha=0.6
+        )
     legend_elems = [
         Line2D([0], [0], color="black", label="Granites"),
         Line2D([0], [0], color="red", label="Ultramafics"),
@@ -314,7 +1344,7 @@ def compare_rock_types(
 
 
 if __name__ == "__main__":
-    from matplotlib.lines import Line2D
+    # Run from the repository root with: python -m module2.GeochemDataset
     # import matplotlib.pyplot as plt
 
     # Getting path stuff sorted out. Put your local path here!
@@ -0,0 +1,40 @@
+import importlib
+
+# Header parsing only needs NumPy, so it is imported right away. The names
+# below from the GeochemDataset submodule (which needs pandas) are imported
+# on first access. `module2.GeochemDataset` is always the submodule; import
+# the class with `from module2.GeochemDataset import GeochemDataset`.
+from .schema import (
+    ElementalMeasurement,
+    MeasurementSchema,
+    parse_elemental_measurements,
+)
+
+_lazy_exports = {
+    "GeochemSample": ".GeochemDataset",
+    "GeochemStandard": ".GeochemDataset",
+    "compare_rock_types": ".GeochemDataset",
+}
+
+__all__ = [
+    "ElementalMeasurement",
+    "GeochemSample",
+    "GeochemStandard",
+    "MeasurementSchema",
+    "compare_rock_types",
+    "parse_elemental_measurements",
+]
+
+
+def __getattr__(name: str):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_lazy_exports[name], __name__)
+    for export, source in _lazy_exports.items():
+        if source == _lazy_exports[name]:
+            globals()[export] = getattr(module, export)
+    return globals()[name]
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,310 @@
+# module2/aggregation.py
+
+# External Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from .detection import substitute_below_detection
+
+
+# Statistics understood by `aggregate`, besides percentiles written as
+# "p" followed by the percentile (e.g. "p90").
+aggregation_stats = ("count", "sum", "mean", "std", "min", "max", "median")
+
+
+def _percentile(stat: str) -> float | None:
+    # Percentile of a statistic name, or None if it is not a percentile.
+    if stat == "median":
+        return 50.0
+    if stat.startswith("p"):
+        try:
+            q = float(stat[1:])
+        except ValueError:
+            return None
+        if 0 <= q <= 100:
+            return q
+    return None
+
+
+def _weighted_percentile(
+    block: np.ndarray, weights: np.ndarray, q: float
+) -> np.ndarray:
+    # Weighted percentile of every column of `block`; NaN values and
+    # non-positive weights are ignored.
+    w = np.where(np.isnan(block), 0.0, weights[:, None])
+    order = np.argsort(block, axis=0)
+    sorted_values = np.take_along_axis(block, order, axis=0)
+    cumulative = np.cumsum(np.take_along_axis(w, order, axis=0), axis=0)
+    total = cumulative[-1]
+    target = q / 100 * total
+    idx = np.argmax(cumulative >= target[None, :] - 1e-12 * total, axis=0)
+    result = sorted_values[idx, np.arange(block.shape[1])]
+    return np.where(total > 0, result, np.nan)
+
+
+def aggregate(
+    values: np.ndarray,
+    codes: np.ndarray,
+    ngroups: int,
+    stats: tuple[str, ...],
+    weights: np.ndarray | None = None
+) -> dict[str, np.ndarray]:
+    """
+    Per-group statistics of every column of `values`, ignoring NaN.
+
+    Rows are sorted by group once; counts, sums, extremes and moments are
+    then reduced for all groups in single `reduceat` calls.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Array of shape (rows, columns).
+    codes: np.ndarray
+        Group code of each row, in 0..ngroups-1 (-1 rows are dropped).
+    ngroups: int
+        Number of groups.
+    stats: tuple[str, ...]
+        Statistics to compute (see `aggregation_stats`, plus "pNN").
+    weights: np.ndarray, optional
+        Weight of each row. Weighted statistics are used for sum, mean, std,
+        median and percentiles; rows with a missing or non-positive weight
+        are left out of them. Default is None.
+
+    Returns
+    -------
+    results: dict[str, np.ndarray]
+        Array of shape (ngroups, columns) for each statistic.
+    """
+    for stat in stats:
+        if stat not in aggregation_stats and _percentile(stat) is None:
+            raise ValueError(f"{stat} is an invalid statistic.")
+
+    keep = codes >= 0
+    order = np.argsort(codes[keep], kind="stable")
+    rows = np.flatnonzero(keep)[order]
+    codes = codes[rows]
+    # Accumulate in float64 even for a compact (float32) dataset.
+    block = values[rows].astype(float)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)[rows]
+        weights = np.where(np.isfinite(weights) & (weights > 0), weights, 0)
+
+    ncols = values.shape[1]
+    results = {
+        stat: np.full((ngroups, ncols), np.nan) for stat in stats
+    }
+    if len(rows) == 0:
+        if "count" in results:
+            results["count"][:] = 0
+        return results
+
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    stops = np.r_[starts[1:], len(codes)]
+    present = codes[starts]
+
+    measured = ~np.isnan(block)
+    filled = np.where(measured, block, 0.0)
+    if weights is None:
+        w = measured.astype(float)
+    else:
+        w = np.where(measured, weights[:, None], 0.0)
+    count = np.add.reduceat(measured, starts, axis=0).astype(float)
+    wsum = np.add.reduceat(w, starts, axis=0)
+    total = np.add.reduceat(w * filled, starts, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(wsum > 0, total / wsum, np.nan)
+
+    if "count" in results:
+        results["count"][:] = 0
+        results["count"][present] = count
+    if "sum" in results:
+        results["sum"][present] = np.where(wsum > 0, total, np.nan)
+    if "mean" in results:
+        results["mean"][present] = mean
+    if "std" in results:
+        deviation = np.where(
+            measured, block - np.repeat(mean, stops - starts, axis=0), 0.0
+        )
+        m2 = np.add.reduceat(w * deviation**2, starts, axis=0)
+        if weights is None:
+            dof = wsum - 1
+        else:
+            # Reliability weights: unbiased weighted variance.
+            w2 = np.add.reduceat(w**2, starts, axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                dof = wsum - w2 / wsum
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results["std"][present] = np.where(
+                dof > 0, np.sqrt(m2 / dof), np.nan
+            )
+    if "min" in results:
+        results["min"][present] = np.fmin.reduceat(block, starts, axis=0)
+    if "max" in results:
+        results["max"][present] = np.fmax.reduceat(block, starts, axis=0)
+
+    percentiles = [
+        (stat, _percentile(stat)) for stat in stats
+        if stat not in ("count", "sum", "mean", "std", "min", "max")
+    ]
+    if percentiles:
+        for group, start, stop in zip(present, starts, stops):
+            group_block = block[start:stop]
+            for stat, q in percentiles:
+                if weights is None:
+                    all_nan = np.isnan(group_block).all(axis=0)
+                    with np.errstate(invalid="ignore"):
+                        result = np.nanpercentile(
+                            np.where(all_nan, 0.0, group_block), q, axis=0
+                        )
+                    results[stat][group] = np.where(all_nan, np.nan, result)
+                else:
+                    results[stat][group] = _weighted_percentile(
+                        group_block, weights[start:stop], q
+                    )
+    return results
+
+
+class GroupedDataset:
+    """
+    Grouping of a GeochemDataset's rows by a metadata column, created with
+    `GeochemDataset.groupby`.
+
+    Parameters
+    ----------
+    dataset: GeochemDataset
+        Dataset to aggregate.
+    by: str
+        Metadata column to group by.
+    include_standards: bool, optional
+        Whether standards are included. Default is False.
+    """
+    def __init__(self, dataset, by: str, include_standards: bool = False):
+        if by not in dataset.metadata.columns:
+            raise ValueError(f"{by} is not a metadata column.")
+        self.dataset = dataset
+        self.by = by
+        self.include_standards = include_standards
+
+    def _groups(self, only=None) -> tuple[np.ndarray, pd.Index]:
+        # Group code of every row (-1 for rows left out) and the group
+        # labels. With `only`, just the groups labelled by it are kept.
+        codes, uniques = pd.factorize(
+            self.dataset.metadata[self.by], sort=True
+        )
+        codes = np.asarray(codes)
+        if not self.include_standards:
+            codes = np.where(self.dataset.standard_mask, -1, codes)
+        if only is not None:
+            keep = np.flatnonzero(pd.Index(uniques).isin(only))
+            remap = np.full(len(uniques) + 1, -1)
+            remap[keep] = np.arange(len(keep))
+            codes = remap[codes]
+            uniques = uniques[keep]
+        return codes, pd.Index(uniques, name=self.by)
+
+    def agg(
+        self,
+        stats=("count", "mean"),
+        elements: list[str] | None = None,
+        weights: str | None = None,
+        below_detection: str | float = "exclude"
+    ) -> pd.DataFrame:
+        """
+        Per-group statistics of the reconciled measurements.
+
+        Results are cached on the dataset per (grouping, elements,
+        statistics, weights, detection rule) and recomputed only after the
+        dataset changes.
+
+        Parameters
+        ----------
+        stats: str or list[str], optional
+            Any of count, sum, mean, std, min, max, median, or a percentile
+            such as "p90". Default is ("count", "mean").
+        elements: list[str], optional
+            Element names to aggregate (e.g. ["SiO2", "La"]). Default is None,
+            which uses every analyte.
+        weights: str, optional
+            Metadata column of row weights, e.g. "Rcvd_Sample_Wt_kg". Default
+            is None.
+        below_detection: str or float, optional
+            "exclude" to leave below-detection values out, or a substitution
+            rule of `GeochemDataset.substituted_values` (e.g. "half").
+            Default is "exclude".
+
+        Returns
+        -------
+        statistics: pd.DataFrame
+            One row per group and an (analyte, statistic) column for each
+            requested statistic.
+        """
+        if isinstance(stats, str):
+            stats = (stats,)
+        key = (
+            self.by,
+            None if elements is None else tuple(elements),
+            tuple(stats),
+            weights,
+            below_detection,
+            self.include_standards,
+        )
+        return self.dataset._cached_aggregate(
+            key, lambda: self._compute(*key[1:5])
+        ).copy()
+
+    def _compute(
+        self, elements, stats, weights, below_detection, groups=None
+    ):
+        dataset = self.dataset
+        reconciled = dataset.reconciled
+        if elements is None:
+            analytes = np.arange(len(reconciled.names))
+        else:
+            analytes = np.array([
+                i for name in elements for i in reconciled.analytes_for(name)
+            ], dtype=int)
+
+        # Only the rows that belong to a group are gathered.
+        codes, labels = self._groups(only=groups)
+        rows = np.flatnonzero(codes >= 0)
+        codes = codes[rows]
+
+        values = reconciled.values[np.ix_(rows, analytes)]
+        below = reconciled.below_detection[np.ix_(rows, analytes)]
+        if below_detection == "exclude":
+            values = np.where(below, np.nan, values)
+        else:
+            substituted = substitute_below_detection(
+                dataset.values[rows], dataset.below_detection[rows],
+                below_detection
+            )
+            source = reconciled.source_columns[np.ix_(rows, analytes)]
+            values = np.where(
+                source >= 0,
+                substituted[
+                    np.arange(len(rows))[:, None], np.maximum(source, 0)
+                ],
+                np.nan,
+            )
+
+        row_weights = None
+        if weights is not None:
+            row_weights = pd.to_numeric(
+                dataset.metadata[weights].iloc[rows], errors="coerce"
+            ).to_numpy(dtype=float)
+
+        results = aggregate(values, codes, len(labels), stats, row_weights)
+        names = [
+            f"{name}_{unit}" if (reconciled.names[analytes] == name).sum() > 1
+            else name
+            for name, unit in zip(
+                reconciled.names[analytes], reconciled.units[analytes]
+            )
+        ]
+        data = np.stack([results[i] for i in stats], axis=-1)
+        return pd.DataFrame(
+            data.reshape(len(labels), -1),
+            index=labels,
+            columns=pd.MultiIndex.from_product([names, list(stats)]),
+        )
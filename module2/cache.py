@@ -0,0 +1,139 @@
+# module2/cache.py
+
+# Standard Libraries
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+
+# External Imports
+import numpy as np
+import pandas as pd
+
+
+# Bump whenever the on-disk layout of a cache entry changes.
+CACHE_VERSION = 1
+
+
+def _path_tag(source: Path) -> str:
+    """
+    Stable directory name for all cache entries of one source file.
+    """
+    return hashlib.sha1(str(source.resolve()).encode()).hexdigest()
+
+
+def cache_key(source) -> str:
+    """
+    Key of the cache entry for the current state of a source file.
+
+    Parameters
+    ----------
+    source: Path-like
+        Path to the source csv file.
+
+    Returns
+    -------
+    key: str
+        Hash of the resolved path, modification time and size of `source`.
+        Any change to the file therefore gives a new key.
+    """
+    source = Path(source)
+    stat = source.stat()
+    identity = f"{source.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|" \
+               f"{CACHE_VERSION}"
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def load_cached_dataset(
+    source, cache_dir, key: str | None = None
+) -> tuple[list[str], np.ndarray, pd.DataFrame] | None:
+    """
+    Loads a parsed dataset from the cache, if an up-to-date entry exists.
+
+    Parameters
+    ----------
+    source: Path-like
+        Path to the source csv file.
+    cache_dir: Path-like
+        Directory that holds the cache.
+    key: str, optional
+        `cache_key` of `source`. Default is None, which computes it now.
+
+    Returns
+    -------
+    cached: tuple or None
+        The full dataset header, the measurement array (memory-mapped,
+        read-only) and the metadata DataFrame. None if `source` has no cache
+        entry or has changed since it was cached.
+    """
+    source = Path(source)
+    if key is None:
+        key = cache_key(source)
+    entry = Path(cache_dir, _path_tag(source), key)
+    if not entry.is_dir():
+        return None
+    try:
+        with open(Path(entry, "header.json")) as f:
+            header = json.load(f)
+        values = np.load(Path(entry, "values.npy"), mmap_mode="r")
+        metadata = pd.read_pickle(Path(entry, "metadata.pkl"))
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        # A corrupt entry is treated as a miss and overwritten on store.
+        return None
+    return header, values, metadata
+
+
+def store_cached_dataset(
+    source,
+    cache_dir,
+    header: list[str],
+    values: np.ndarray,
+    metadata: pd.DataFrame,
+    key: str | None = None
+):
+    """
+    Writes a parsed dataset to the cache, replacing stale entries of the same
+    source file.
+
+    Parameters
+    ----------
+    source: Path-like
+        Path to the source csv file.
+    cache_dir: Path-like
+        Directory that holds the cache.
+    header: list[str]
+        Full header of the source dataset.
+    values: np.ndarray
+        Measurement array of the dataset.
+    metadata: pd.DataFrame
+        Non-measurement columns of the dataset.
+    key: str, optional
+        `cache_key` of `source` taken before it was read, so a file that
+        changed while being parsed is not cached under its new state.
+        Default is None, which computes it now.
+    """
+    source = Path(source)
+    source_dir = Path(cache_dir, _path_tag(source))
+    source_dir.mkdir(parents=True, exist_ok=True)
+    if key is None:
+        key = cache_key(source)
+
+    # Entries are written to a temporary directory first and renamed into
+    # place, so a reader never sees a half-written entry.
+    tmp_dir = Path(tempfile.mkdtemp(dir=source_dir))
+    try:
+        np.save(Path(tmp_dir, "values.npy"), np.ascontiguousarray(values))
+        metadata.to_pickle(Path(tmp_dir, "metadata.pkl"))
+        with open(Path(tmp_dir, "header.json"), "w") as f:
+            json.dump(list(header), f)
+        os.replace(tmp_dir, Path(source_dir, key))
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return
+
+    for stale in source_dir.iterdir():
+        if stale.name != key:
+            shutil.rmtree(stale, ignore_errors=True)
@@ -0,0 +1,130 @@
+# module2/classification.py
+
+# External Imports
+import numpy as np
+
+
+# Major element oxides summed to recalculate analyses volatile-free.
+major_oxides = (
+    "SiO2", "TiO2", "Al2O3", "Fe2O3", "MnO", "MgO", "CaO", "Na2O", "K2O",
+    "P2O5", "BaO", "Cr2O3", "SrO",
+)
+
+# Total-alkali-silica fields as (SiO2, Na2O + K2O) polygons in wt%, after
+# Le Bas et al. (1986), Journal of Petrology 27, 745-750. Open fields are
+# closed at 35-90 wt% SiO2 and 16 wt% total alkalis.
+tas_fields = {
+    "Foidite": [
+        (35, 0), (41, 0), (41, 7), (45, 9.4), (48.4, 11.5), (52.5, 14),
+        (52.5, 16), (35, 16),
+    ],
+    "Picrobasalt": [(41, 0), (41, 3), (45, 3), (45, 0)],
+    "Basalt": [(45, 0), (45, 5), (52, 5), (52, 0)],
+    "Basaltic andesite": [(52, 0), (52, 5), (57, 5.9), (57, 0)],
+    "Andesite": [(57, 0), (57, 5.9), (63, 7), (63, 0)],
+    "Dacite": [(63, 0), (63, 7), (69, 8), (77.3, 0)],
+    "Rhyolite": [(77.3, 0), (69, 8), (69, 16), (90, 16), (90, 0)],
+    "Trachybasalt": [(45, 5), (49.4, 7.3), (52, 5)],
+    "Basaltic trachyandesite": [(52, 5), (49.4, 7.3), (53, 9.3), (57, 5.9)],
+    "Trachyandesite": [(57, 5.9), (53, 9.3), (57.6, 11.7), (63, 7)],
+    "Trachyte/Trachydacite": [
+        (63, 7), (57.6, 11.7), (61, 13.5), (65.7, 16), (69, 16), (69, 8),
+    ],
+    "Tephrite/Basanite": [
+        (41, 3), (41, 7), (45, 9.4), (49.4, 7.3), (45, 5), (45, 3),
+    ],
+    "Phonotephrite": [(45, 9.4), (48.4, 11.5), (53, 9.3), (49.4, 7.3)],
+    "Tephriphonolite": [(48.4, 11.5), (52.5, 14), (57.6, 11.7), (53, 9.3)],
+    "Phonolite": [
+        (52.5, 14), (57.6, 11.7), (61, 13.5), (65.7, 16), (52.5, 16),
+    ],
+}
+
+
+def classify_silica(
+    sio2: np.ndarray,
+    bins: tuple[float, ...] = (50, 70),
+    labels: tuple[str, ...] = ("Basalt", "Dacite", "Rhyolite")
+) -> np.ndarray:
+    """
+    Classifies rocks by SiO2 content.
+
+    Parameters
+    ----------
+    sio2: np.ndarray
+        SiO2 in wt%.
+    bins: tuple[float, ...], optional
+        Increasing bin edges. A value equal to an edge goes in the upper bin.
+        Default is (50, 70).
+    labels: tuple[str, ...], optional
+        One label per bin, one more than `bins`. Default is
+        ("Basalt", "Dacite", "Rhyolite").
+
+    Returns
+    -------
+    rock_types: np.ndarray
+        Label of each value (None where SiO2 is NaN).
+    """
+    if len(labels) != len(bins) + 1:
+        raise ValueError("There must be one more label than bin edges.")
+    sio2 = np.asarray(sio2, dtype=float)
+    lookup = np.array(list(labels) + [None], dtype=object)
+    idx = np.digitize(sio2, bins)
+    return lookup[np.where(np.isnan(sio2), len(labels), idx)]
+
+
+def points_in_polygon(
+    x: np.ndarray, y: np.ndarray, polygon: list[tuple[float, float]]
+) -> np.ndarray:
+    """
+    Even-odd (ray casting) point-in-polygon test, vectorized over points.
+
+    Parameters
+    ----------
+    x, y: np.ndarray
+        Point coordinates.
+    polygon: list[tuple[float, float]]
+        Polygon vertices, in order.
+
+    Returns
+    -------
+    inside: np.ndarray
+        Boolean array, True for points inside the polygon.
+    """
+    inside = np.zeros(np.shape(x), dtype=bool)
+    vertices = np.asarray(polygon, dtype=float)
+    for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if y0 == y1:
+            continue
+        crosses = (y0 > y) != (y1 > y)
+        x_cross = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (x < x_cross)
+    return inside
+
+
+def classify_tas(sio2: np.ndarray, alkalis: np.ndarray) -> np.ndarray:
+    """
+    Classifies volcanic rocks on the total-alkali-silica (TAS) diagram.
+
+    Parameters
+    ----------
+    sio2: np.ndarray
+        SiO2 in wt%.
+    alkalis: np.ndarray
+        Na2O + K2O in wt%.
+
+    Returns
+    -------
+    rock_types: np.ndarray
+        TAS field name of each analysis (None outside every field or where
+        an input is NaN).
+    """
+    sio2 = np.asarray(sio2, dtype=float)
+    alkalis = np.asarray(alkalis, dtype=float)
+    rock_types = np.full(sio2.shape, None, dtype=object)
+    unassigned = ~(np.isnan(sio2) | np.isnan(alkalis))
+    for name, polygon in tas_fields.items():
+        inside = unassigned & points_in_polygon(sio2, alkalis, polygon)
+        rock_types[inside] = name
+        unassigned &= ~inside
+    return rock_types
@@ -0,0 +1,76 @@
+# module2/detection.py
+
+# External Imports
+import numpy as np
+
+
+# Lab exports report results below the detection limit as the negative of
+# the limit (e.g. -0.01) and leave measurements that were not made empty.
+# These are the factors of the detection limit that a below-detection result
+# can be replaced with.
+substitution_rules = {
+    "half": 0.5,
+    "limit": 1.0,
+    "zero": 0.0,
+    "nan": np.nan,
+}
+
+
+def flag_detection_limits(
+    values: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Flags below-detection and not-analyzed cells of a measurement array.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Measurement array, as read from a lab export.
+
+    Returns
+    -------
+    below_detection: np.ndarray
+        Boolean array, True where the result is below the detection limit
+        (a negative value).
+    not_analyzed: np.ndarray
+        Boolean array, True where no measurement was made (NaN).
+    """
+    not_analyzed = np.isnan(values)
+    with np.errstate(invalid="ignore"):
+        below_detection = values < 0
+    return below_detection, not_analyzed
+
+
+def substitute_below_detection(
+    values: np.ndarray,
+    below_detection: np.ndarray,
+    rule: str | float = "half"
+) -> np.ndarray:
+    """
+    Replaces below-detection results with a multiple of the detection limit.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Measurement array, as read from a lab export.
+    below_detection: np.ndarray
+        Below-detection flags of `values` (see `flag_detection_limits`).
+    rule: str or float, optional
+        One of "half" (DL/2), "limit" (DL), "zero" or "nan", or the factor of
+        the detection limit to use. Default is "half".
+
+    Returns
+    -------
+    substituted: np.ndarray
+        Copy of `values` with below-detection cells replaced.
+    """
+    if isinstance(rule, str):
+        if rule not in substitution_rules:
+            raise ValueError(
+                f"{rule} is an invalid substitution rule. Valid rules are: "
+                f"{', '.join(substitution_rules)}."
+            )
+        factor = substitution_rules[rule]
+    else:
+        factor = float(rule)
+    return np.where(below_detection, -factor * values, values)
@@ -0,0 +1,98 @@
+# module2/normalization.py
+
+# External Imports
+import numpy as np
+
+
+# Element orders for normalized diagrams. K, P and Ti are left out of the
+# multi-element order because they are reported as oxides in percent.
+element_orders = {
+    "ree": (
+        "La", "Ce", "Pr", "Nd", "Sm", "Eu", "Gd", "Tb", "Dy", "Ho", "Er",
+        "Tm", "Yb", "Lu",
+    ),
+    "spider": (
+        "Cs", "Rb", "Ba", "Th", "U", "Nb", "Ta", "La", "Ce", "Pb", "Pr",
+        "Sr", "Nd", "Zr", "Hf", "Sm", "Eu", "Gd", "Tb", "Dy", "Y", "Ho",
+        "Er", "Tm", "Yb", "Lu",
+    ),
+}
+
+# Reference compositions in ppm, from Sun & McDonough (1989), Geological
+# Society Special Publication 42, 313-345.
+reference_compositions = {
+    "chondrite": {
+        "Cs": 0.188, "Rb": 2.32, "Ba": 2.41, "Th": 0.029, "U": 0.008,
+        "Nb": 0.246, "Ta": 0.014, "La": 0.237, "Ce": 0.612, "Pb": 2.47,
+        "Pr": 0.095, "Sr": 7.26, "Nd": 0.467, "Zr": 3.87, "Hf": 0.1066,
+        "Sm": 0.153, "Eu": 0.058, "Gd": 0.2055, "Tb": 0.0374, "Dy": 0.254,
+        "Y": 1.57, "Ho": 0.0566, "Er": 0.1655, "Tm": 0.0255, "Yb": 0.17,
+        "Lu": 0.0254,
+    },
+    "primitive_mantle": {
+        "Cs": 0.032, "Rb": 0.635, "Ba": 6.989, "Th": 0.085, "U": 0.021,
+        "Nb": 0.713, "Ta": 0.041, "La": 0.687, "Ce": 1.775, "Pb": 0.185,
+        "Pr": 0.276, "Sr": 21.1, "Nd": 1.354, "Zr": 11.2, "Hf": 0.309,
+        "Sm": 0.444, "Eu": 0.168, "Gd": 0.596, "Tb": 0.108, "Dy": 0.737,
+        "Y": 4.55, "Ho": 0.164, "Er": 0.48, "Tm": 0.074, "Yb": 0.493,
+        "Lu": 0.074,
+    },
+    "morb": {
+        "Cs": 0.007, "Rb": 0.56, "Ba": 6.3, "Th": 0.12, "U": 0.047,
+        "Nb": 2.33, "Ta": 0.132, "La": 2.5, "Ce": 7.5, "Pb": 0.3,
+        "Pr": 1.32, "Sr": 90, "Nd": 7.3, "Zr": 74, "Hf": 2.05,
+        "Sm": 2.63, "Eu": 1.02, "Gd": 3.68, "Tb": 0.67, "Dy": 4.55,
+        "Y": 28, "Ho": 1.01, "Er": 2.97, "Tm": 0.456, "Yb": 3.05,
+        "Lu": 0.455,
+    },
+}
+
+
+def normalize(
+    values: np.ndarray,
+    names: np.ndarray,
+    reference: str = "chondrite",
+    order: str = "ree"
+) -> tuple[tuple[str, ...], np.ndarray]:
+    """
+    Normalizes a block of ppm values to a reference composition.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Array of shape (rows, analytes) of ppm values. Cells that should not
+        be plotted (e.g. below detection) should already be NaN.
+    names: np.ndarray
+        Element name of each analyte column.
+    reference: str, optional
+        One of "chondrite", "primitive_mantle" or "morb". Default is
+        "chondrite".
+    order: str, optional
+        Element order, either "ree" or "spider". Default is "ree".
+
+    Returns
+    -------
+    elements: tuple[str, ...]
+        Elements of the normalized columns, in `order`. Elements missing
+        from `names` are left out.
+    normalized: np.ndarray
+        Array of shape (rows, elements) of sample/reference ratios.
+    """
+    if reference not in reference_compositions:
+        raise ValueError(
+            f"{reference} is an invalid reference. Valid references are: "
+            f"{', '.join(reference_compositions)}."
+        )
+    if order not in element_orders:
+        raise ValueError(
+            f"{order} is an invalid element order. Valid orders are: "
+            f"{', '.join(element_orders)}."
+        )
+    composition = reference_compositions[reference]
+    columns = {}
+    for n, name in enumerate(names):
+        columns.setdefault(name, n)
+    elements = tuple(i for i in element_orders[order] if i in columns)
+    cols = [columns[i] for i in elements]
+    divisor = np.array([composition[i] for i in elements])
+    return elements, values[:, cols] / divisor
@@ -0,0 +1,242 @@
+# module2/qc.py
+
+# Standard Libraries
+import re
+
+# External Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from .classification import major_oxides
+
+
+# Recommended values of USGS reference materials (oxides in wt%, Ba, Sr and
+# Zr in ppm), from the USGS certificates of analysis. Standards missing
+# here can be added with the `certified` argument of `StandardsQC`.
+certified_values = {
+    "AGV2": {
+        "SiO2": 59.3, "TiO2": 1.05, "Al2O3": 16.91, "Fe2O3": 6.69,
+        "MnO": 0.10, "MgO": 1.79, "CaO": 5.20, "Na2O": 4.19, "K2O": 2.88,
+        "P2O5": 0.48, "Ba": 1140, "Sr": 661, "Zr": 230,
+    },
+    "BCR2": {
+        "SiO2": 54.1, "TiO2": 2.26, "Al2O3": 13.5, "Fe2O3": 13.8,
+        "MgO": 3.59, "CaO": 7.12, "Na2O": 3.16, "K2O": 1.79, "P2O5": 0.35,
+        "Ba": 683, "Sr": 346, "Zr": 188,
+    },
+    "W2": {
+        "SiO2": 52.68, "TiO2": 1.06, "Al2O3": 15.45, "Fe2O3": 10.83,
+        "MnO": 0.163, "MgO": 6.37, "CaO": 10.86, "Na2O": 2.20,
+        "K2O": 0.626, "P2O5": 0.13, "Ba": 182, "Sr": 194, "Zr": 94,
+    },
+    "GSP2": {
+        "SiO2": 66.6, "TiO2": 0.66, "Al2O3": 14.9, "Fe2O3": 4.90,
+        "MgO": 0.96, "CaO": 2.10, "Na2O": 2.78, "K2O": 5.38, "P2O5": 0.29,
+        "Ba": 1340, "Sr": 240, "Zr": 550,
+    },
+}
+
+
+def _certified_analyte(reconciled, name: str) -> int:
+    # Analyte a certified value applies to: oxides in percent, everything
+    # else in ppm. -1 if the element was not reported in that unit.
+    unit = "percent" if name in major_oxides else "ppm"
+    for analyte in reconciled.analytes_for(name):
+        if reconciled.units[analyte] == unit:
+            return analyte
+    return -1
+
+
+def standard_key(name) -> str:
+    """
+    Normalizes a standard name for lookups ("W-2", "w2" and "W2" match).
+    """
+    return re.sub(r"[^0-9A-Z]", "", str(name).upper())
+
+
+class StandardsQC:
+    """
+    Recovery, z-scores and drift of every standard and analyte in a dataset,
+    computed in one vectorized pass over the standard rows.
+
+    Parameters
+    ----------
+    dataset: GeochemDataset
+        Dataset whose standards are checked.
+    certified: dict or pd.DataFrame, optional
+        Certified values per standard name and element name, added to (and
+        overriding) `certified_values`. Default is None.
+    target_rsd: float, optional
+        Relative standard deviation expected of an analysis, used to scale
+        z-scores. Default is 0.05 (5%).
+
+    Attributes
+    ----------
+    standards: np.ndarray
+        Name of each standard analysis.
+    reports: np.ndarray
+        Report of each standard analysis.
+    analytes: np.ndarray
+        Element name of each checked analyte column.
+    certified: np.ndarray
+        Array of shape (standards, analytes) of certified values (NaN where
+        not certified).
+    measured: np.ndarray
+        Array of shape (standards, analytes) of reconciled measured values
+        (NaN where not measured or below detection).
+    recovery: np.ndarray
+        Measured value as a percentage of the certified value.
+    z_scores: np.ndarray
+        (measured - certified) / (target_rsd * certified).
+    """
+    def __init__(self, dataset, certified=None, target_rsd: float = 0.05):
+        table = {
+            standard_key(k): dict(v) for k, v in certified_values.items()
+        }
+        if certified is not None:
+            if isinstance(certified, pd.DataFrame):
+                certified = certified.to_dict(orient="index")
+            for name, values in certified.items():
+                table.setdefault(standard_key(name), {}).update({
+                    k: v for k, v in values.items() if pd.notna(v)
+                })
+
+        rows = np.flatnonzero(dataset.standard_mask)
+        reconciled = dataset.reconciled
+        elements = sorted({k for v in table.values() for k in v})
+        analytes = np.array(
+            [_certified_analyte(reconciled, i) for i in elements], dtype=int
+        )
+        analytes = analytes[analytes >= 0]
+
+        self.standards = dataset.metadata["Sample"].to_numpy()[rows]
+        self.reports = dataset.metadata["Report"].to_numpy()[rows]
+        self.analytes = reconciled.names[analytes]
+        self.target_rsd = target_rsd
+
+        keys = [standard_key(i) for i in self.standards]
+        self.certified = np.array([
+            [table.get(k, {}).get(name, np.nan) for name in self.analytes]
+            for k in keys
+        ], dtype=float).reshape(len(rows), len(analytes))
+        self.measured = np.where(
+            reconciled.below_detection[np.ix_(rows, analytes)],
+            np.nan,
+            reconciled.values[np.ix_(rows, analytes)],
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.recovery = 100 * self.measured / self.certified
+            self.z_scores = (self.measured - self.certified) / \
+                (target_rsd * self.certified)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Long table with one row per checked (standard analysis, analyte).
+        """
+        checked = ~np.isnan(self.z_scores)
+        row, col = np.nonzero(checked)
+        return pd.DataFrame({
+            "Standard": self.standards[row],
+            "Report": self.reports[row],
+            "Analyte": self.analytes[col],
+            "Certified": self.certified[row, col],
+            "Measured": self.measured[row, col],
+            "Recovery": self.recovery[row, col],
+            "Z": self.z_scores[row, col],
+        })
+
+    def drift(self) -> pd.DataFrame:
+        """
+        Linear drift of recovery over report order for every standard and
+        analyte.
+
+        Reports are ordered by their report number. The slope of a least
+        squares fit of recovery against report rank is computed for all
+        (standard, analyte) pairs at once.
+
+        Returns
+        -------
+        drift: pd.DataFrame
+            Recovery change per report (percentage points), indexed by
+            standard name, one column per analyte. NaN where a standard was
+            checked in fewer than two reports.
+        """
+        report_rank = pd.Index(np.unique(self.reports.astype(str)))
+        x = report_rank.get_indexer(self.reports.astype(str)).astype(float)
+        keys = np.array([standard_key(i) for i in self.standards])
+        codes, names = pd.factorize(keys, sort=True)
+
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0]) \
+            if len(codes) else np.zeros(0, dtype=int)
+        y = self.recovery[order]
+        xs = np.broadcast_to(x[order][:, None], y.shape)
+        valid = ~np.isnan(y)
+        w = valid.astype(float)
+
+        def group_sum(a):
+            if len(starts) == 0:
+                return np.zeros((0, y.shape[1]))
+            return np.add.reduceat(np.where(valid, a, 0.0), starts, axis=0)
+
+        n = group_sum(w)
+        sx = group_sum(xs)
+        sy = group_sum(y)
+        sxx = group_sum(xs * xs)
+        sxy = group_sum(xs * y)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            denominator = n * sxx - sx**2
+            slope = np.where(
+                denominator > 0, (n * sxy - sx * sy) / denominator, np.nan
+            )
+        return pd.DataFrame(
+            slope,
+            index=pd.Index(
+                [self.standards[order][i] for i in starts], name="Standard"
+            ),
+            columns=self.analytes,
+        )
+
+    def report_flags(self, z_limit: float = 2.0) -> pd.DataFrame:
+        """
+        Flags reports whose standards fall out of tolerance.
+
+        Parameters
+        ----------
+        z_limit: float, optional
+            Largest acceptable absolute z-score. Default is 2.
+
+        Returns
+        -------
+        flags: pd.DataFrame
+            Indexed by report, with the number of checked and failed
+            (standard, analyte) values, the worst absolute z-score and a
+            boolean `flagged` column.
+        """
+        abs_z = np.abs(self.z_scores)
+        checked = ~np.isnan(abs_z)
+        with np.errstate(invalid="ignore"):
+            failed = abs_z > z_limit
+        codes, reports = pd.factorize(self.reports, sort=True)
+        nreports = len(reports)
+        n_checked = np.bincount(
+            codes, weights=checked.sum(axis=1), minlength=nreports
+        )
+        n_failed = np.bincount(
+            codes, weights=failed.sum(axis=1), minlength=nreports
+        )
+        worst = np.full(nreports, np.nan)
+        row_worst = np.max(np.where(checked, abs_z, -np.inf), axis=1,
+                           initial=-np.inf)
+        np.fmax.at(worst, codes, np.where(row_worst > -np.inf, row_worst,
+                                          np.nan))
+        return pd.DataFrame(
+            {
+                "checked": n_checked.astype(int),
+                "failed": n_failed.astype(int),
+                "max_abs_z": worst,
+                "flagged": n_failed > 0,
+            },
+            index=pd.Index(reports, name="Report"),
+        )
@@ -0,0 +1,212 @@
+# module2/query.py
+
+# External Imports
+import numpy as np
+import pandas as pd
+
+
+# Query keywords and the metadata columns they look up.
+query_fields = {
+    "rock_class": "Rock_Class",
+    "rock_type": "Rock_Type",
+    "rock_name": "Rock_Name",
+    "series": "Series",
+    "report": "Report",
+    "sample": "Sample",
+}
+
+
+class CategoricalIndex:
+    """
+    Integer-coded index over one metadata column.
+
+    Each distinct label is stored once; rows are grouped by label so the rows
+    of any label are found without scanning the column.
+
+    Parameters
+    ----------
+    labels: array-like
+        Column values, one per dataset row. Surrounding whitespace of string
+        labels is ignored and missing labels are never matched.
+
+    Attributes
+    ----------
+    codes: np.ndarray
+        Category code of each row (-1 for missing labels).
+    categories: np.ndarray
+        Distinct labels, indexed by code.
+    """
+    def __init__(self, labels):
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.categories = np.zeros(0, dtype=object)
+        self._category_codes = {}
+        self.extend(labels)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def extend(self, labels):
+        """
+        Adds rows to the end of the index.
+
+        Parameters
+        ----------
+        labels: array-like
+            Column values of the new rows.
+        """
+        labels = pd.Series(labels, dtype=object)
+        labels = labels.where(labels.isna(), labels.astype(str).str.strip())
+        codes, uniques = pd.factorize(labels)
+        new_codes = np.empty(len(uniques), dtype=np.int64)
+        new_categories = []
+        for n, label in enumerate(uniques):
+            if label not in self._category_codes:
+                self._category_codes[label] = len(self.categories) + \
+                    len(new_categories)
+                new_categories.append(label)
+            new_codes[n] = self._category_codes[label]
+        if new_categories:
+            self.categories = np.concatenate(
+                [self.categories, np.array(new_categories, dtype=object)]
+            )
+
+        # Missing labels keep code -1 (every label may be missing).
+        mapped = np.full(len(codes), -1, dtype=np.int64)
+        mapped[codes >= 0] = new_codes[codes[codes >= 0]]
+        self.codes = np.concatenate([self.codes, mapped])
+        self._order = None
+
+    def _postings(self) -> tuple[np.ndarray, np.ndarray]:
+        # Row numbers sorted by code, plus the offset of each code's block.
+        if self._order is None:
+            self._order = np.argsort(self.codes, kind="stable")
+            counts = np.bincount(
+                self.codes[self.codes >= 0], minlength=len(self.categories)
+            )
+            self._offsets = np.r_[
+                np.count_nonzero(self.codes < 0), counts
+            ].cumsum()
+        return self._order, self._offsets
+
+    def lookup(self, value, contains: bool = False) -> np.ndarray:
+        """
+        Category codes matching `value`.
+
+        Parameters
+        ----------
+        value: str or list[str]
+            Label, or list of labels, to match.
+        contains: bool, optional
+            Match every label that contains `value` as a substring instead of
+            exact matches. Default is False.
+
+        Returns
+        -------
+        codes: np.ndarray
+            Matching category codes.
+        """
+        if isinstance(value, str) or not np.iterable(value):
+            value = [value]
+        value = [i.strip() if isinstance(i, str) else i for i in value]
+        if contains:
+            return np.array([
+                code for code, label in enumerate(self.categories)
+                if any(str(i) in str(label) for i in value)
+            ], dtype=np.int64)
+        return np.array([
+            self._category_codes[i] for i in value
+            if i in self._category_codes
+        ], dtype=np.int64)
+
+    def rows(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Sorted rows whose category code is in `codes`.
+        """
+        order, offsets = self._postings()
+        blocks = [order[offsets[i]:offsets[i + 1]] for i in codes]
+        if not blocks:
+            return np.zeros(0, dtype=np.int64)
+        return np.sort(np.concatenate(blocks))
+
+
+class DatasetIndex:
+    """
+    Categorical indexes over the metadata of a GeochemDataset.
+
+    Indexes are built per field the first time that field is queried.
+
+    Parameters
+    ----------
+    metadata: pd.DataFrame
+        Metadata of the dataset.
+    """
+    def __init__(self, metadata: pd.DataFrame):
+        self._metadata = metadata
+        self._indexes = {}
+
+    def extend(self, metadata: pd.DataFrame):
+        """
+        Adds rows to the end of every index built so far.
+
+        Parameters
+        ----------
+        metadata: pd.DataFrame
+            Metadata of the dataset: the rows already indexed followed by the
+            new rows.
+        """
+        start = len(self._metadata)
+        self._metadata = metadata
+        for field, index in self._indexes.items():
+            column = query_fields[field]
+            if column in metadata.columns:
+                labels = metadata[column].iloc[start:]
+            else:
+                labels = [None] * (len(metadata) - start)
+            index.extend(labels)
+
+    def __getitem__(self, field: str) -> CategoricalIndex:
+        if field not in query_fields:
+            raise ValueError(
+                f"{field} is not a valid query field. Valid fields are: "
+                f"{', '.join(query_fields)}."
+            )
+        if field not in self._indexes:
+            column = query_fields[field]
+            if column in self._metadata.columns:
+                labels = self._metadata[column]
+            else:
+                labels = [None] * len(self._metadata)
+            self._indexes[field] = CategoricalIndex(labels)
+        return self._indexes[field]
+
+    def select(self, contains: bool = False, **criteria) -> np.ndarray:
+        """
+        Rows matching every criterion.
+
+        Parameters
+        ----------
+        contains: bool, optional
+            Match labels by substring instead of exactly. Default is False.
+        **criteria
+            Query field and the label (or list of labels) it must match, e.g.
+            rock_name="granite".
+
+        Returns
+        -------
+        rows: np.ndarray
+            Sorted row numbers.
+        """
+        if not criteria:
+            raise ValueError("At least one query criterion is required.")
+        rows = None
+        for field, value in criteria.items():
+            index = self[field]
+            codes = index.lookup(value, contains=contains)
+            if rows is None:
+                rows = index.rows(codes)
+            else:
+                # Later criteria only have to check the remaining candidates.
+                rows = rows[np.isin(index.codes[rows], codes)]
+            if len(rows) == 0:
+                break
+        return rows
@@ -0,0 +1,182 @@
+# module2/reconcile.py
+
+# External Imports
+import numpy as np
+
+
+# Process codes from most to least preferred when one analyte was measured
+# by several methods. Codes not listed rank after these, in header order.
+default_method_priority = ("XRF26", "ICP06", "MS81", "4ACD81", "MS42", "XRF05")
+
+
+class ReconciledMeasurements:
+    """
+    One best value per analyte and row, chosen across analytical methods.
+
+    Parameters
+    ----------
+    names: np.ndarray
+        Element name of each analyte.
+    units: np.ndarray
+        Unit of each analyte.
+    methods: tuple[str, ...]
+        Process codes, in priority order. `provenance` indexes into this.
+    source_columns: np.ndarray
+        Array of shape (rows, analytes) with the schema column each best
+        value was taken from (-1 where the analyte was not measured).
+    provenance: np.ndarray
+        Array of shape (rows, analytes) with the index into `methods` of the
+        method each best value came from (-1 where not measured).
+    values: np.ndarray
+        Array of shape (rows, analytes) with the best values.
+    below_detection: np.ndarray
+        Array of shape (rows, analytes), True where the best value is below
+        the detection limit.
+    """
+    def __init__(
+        self,
+        names: np.ndarray,
+        units: np.ndarray,
+        methods: tuple[str, ...],
+        source_columns: np.ndarray,
+        provenance: np.ndarray,
+        values: np.ndarray,
+        below_detection: np.ndarray
+    ):
+        self.names = names
+        self.units = units
+        self.methods = methods
+        self.source_columns = source_columns
+        self.provenance = provenance
+        self.values = values
+        self.below_detection = below_detection
+        self._buffers = None
+
+        self.analyte_index = {}
+        for n, name in enumerate(names):
+            self.analyte_index.setdefault(name, []).append(n)
+
+    def analytes_for(self, name: str) -> list[int]:
+        """
+        Analyte positions of the species `name` (more than one if it was
+        reported in several units).
+        """
+        return self.analyte_index.get(name, [])
+
+    def append(self, other: "ReconciledMeasurements"):
+        """
+        Adds the rows of `other` to the end. `other` must be reconciled from
+        the same schema and priority, so its analytes line up with these.
+
+        The row arrays are views into buffers that grow by half when full,
+        so repeated appends only copy the new rows.
+        """
+        start = self.values.shape[0]
+        stop = start + other.values.shape[0]
+        fields = ("source_columns", "provenance", "values", "below_detection")
+        capacity = 0 if self._buffers is None else len(self._buffers[0])
+        if stop > capacity:
+            capacity = max(stop, start * 3 // 2)
+            buffers = []
+            for field in fields:
+                current = getattr(self, field)
+                buffer = np.empty(
+                    (capacity,) + current.shape[1:], dtype=current.dtype
+                )
+                buffer[:start] = current
+                buffers.append(buffer)
+            self._buffers = buffers
+        for field, buffer in zip(fields, self._buffers):
+            buffer[start:stop] = getattr(other, field)
+            setattr(self, field, buffer[:stop])
+
+
+def reconcile_measurements(
+    values: np.ndarray,
+    below_detection: np.ndarray,
+    names: np.ndarray,
+    units: np.ndarray,
+    process_codes: np.ndarray,
+    priority: tuple[str, ...] = default_method_priority
+) -> ReconciledMeasurements:
+    """
+    Picks one best value per analyte (element and unit) for every row.
+
+    For each cell the detected value from the highest-priority method is
+    used. If every method is below detection, the highest-priority
+    below-detection result is used instead.
+
+    Parameters
+    ----------
+    values: np.ndarray
+        Measurement array of shape (rows, columns).
+    below_detection: np.ndarray
+        Below-detection flags of `values`.
+    names, units, process_codes: np.ndarray
+        Element name, unit and process code of each column.
+    priority: tuple[str, ...], optional
+        Process codes from most to least preferred. Default is
+        `default_method_priority`.
+
+    Returns
+    -------
+    reconciled: ReconciledMeasurements
+        Best values and their provenance.
+    """
+    methods = list(priority)
+    for code in process_codes:
+        if code not in methods:
+            methods.append(code)
+    method_rank = {code: n for n, code in enumerate(methods)}
+
+    analytes = {}
+    for col, key in enumerate(zip(names, units)):
+        analytes.setdefault(key, []).append(col)
+    candidates = [
+        sorted(cols, key=lambda i: method_rank[process_codes[i]])
+        for cols in analytes.values()
+    ]
+
+    # Candidate columns of every analyte, padded to the same length, so the
+    # choice is one argmin over the whole (rows, analytes, candidates) block.
+    width = max((len(i) for i in candidates), default=1)
+    candidate_cols = np.full((len(candidates), width), -1, dtype=np.int64)
+    for n, cols in enumerate(candidates):
+        candidate_cols[n, :len(cols)] = cols
+
+    padded = candidate_cols < 0
+    gather = np.where(padded, 0, candidate_cols)
+    cand_values = values[:, gather]
+    cand_below = below_detection[:, gather]
+    score = np.broadcast_to(
+        np.arange(width, dtype=float), cand_values.shape
+    ) + np.where(cand_below, width, 0)
+    score = np.where(np.isnan(cand_values) | padded, np.inf, score)
+
+    choice = np.argmin(score, axis=-1)
+    measured = np.isfinite(np.take_along_axis(
+        score, choice[..., None], axis=-1
+    )[..., 0])
+    source_columns = np.where(
+        measured, candidate_cols[np.arange(len(candidates)), choice], -1
+    )
+    column_method = np.array(
+        [method_rank[i] for i in process_codes] + [-1], dtype=np.int8
+    )
+    provenance = column_method[source_columns]
+
+    safe = np.where(measured, source_columns, 0)
+    rows = np.arange(values.shape[0])[:, None]
+    best = np.where(measured, values[rows, safe], np.nan)
+    best_below = measured & below_detection[rows, safe]
+
+    keys = list(analytes)
+    return ReconciledMeasurements(
+        np.array([i[0] for i in keys], dtype=object),
+        np.array([i[1] for i in keys], dtype=object),
+        tuple(methods),
+        source_columns,
+        provenance,
+        best,
+        best_below,
+    )
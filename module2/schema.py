@@ -0,0 +1,237 @@
+# module2/schema.py
+from __future__ import annotations
+
+# Standard Libraries
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+# External Imports
+import numpy as np
+
+
+process_dict = {
+    "XRF26": "Fluxed Glass Disk X-Ray Fluorescence Spectrometry",
+    "ICP06": "Inductively Coupled Plasma Atomic Emission Spectroscopy",
+    "MS81": "Fluxed-Glass Disk ICP-MS",
+    "4ACD81": "Four Acid Digestions before ICP-MS",
+    "MS42": "Aqua Regia Digestion before ICP-MS",
+    "XRF05": "Powdered X-Ray Fluorescence Spectrometry",
+}
+
+# Column names of elemental measurements follow element_unit_XX_process.
+header_pattern = re.compile(
+    r"^(?P<name>[^_]+)_(?P<unit>[^_]+)_(?:.*_)?(?P<process>[^_]+)$"
+)
+
+# Header names that follow the measurement grammar but are not elements.
+non_element_names = frozenset(["LOI", "Total", "Rcvd"])
+
+# Measurement schemas that have already been parsed, keyed by the full
+# dataset header.
+_schema_registry: dict[tuple[str, ...], MeasurementSchema] = {}
+
+
+class ElementalMeasurement:
+    """
+    Stores data about a measurement process, unit and elemental component.
+
+    Parameters
+    ----------
+    element_string: str
+        Column name of geochemical data spreadsheet, in the format:
+        element_unit_XX_process
+
+    Attributes
+    ----------
+    name: str
+        Name of the elemental species analyzed.
+    unit: str
+        Unit of the measurement.
+    process: str
+        A description of the process by which the species was measured.
+    """
+    def __init__(self, element_string):
+        header_parts = split_header(element_string)
+        if header_parts is None:
+            raise ValueError(
+                f"{element_string} is not in the element_unit_XX_process "
+                "format."
+            )
+        self.name, self.unit, process_code = header_parts
+        self.process = process_dict.get(process_code)
+
+    def set_value(self, val):
+        self.value = val
+
+
+class MeasurementValue(NamedTuple):
+    """
+    A single measured value together with its measurement metadata.
+    """
+    name: str
+    unit: str
+    process: str | None
+    value: float
+
+
+class MeasurementSchema:
+    """
+    Compact table of the elemental measurements found in a dataset header.
+
+    The metadata of each measurement column is held once per dataset, while
+    the measured values themselves live in `GeochemDataset.values`.
+
+    Parameters
+    ----------
+    columns: list[str]
+        Measurement column names, in the format element_unit_XX_process.
+    indices: np.ndarray
+        Positions of the measurement columns in the full dataset header.
+
+    Attributes
+    ----------
+    columns: tuple[str, ...]
+        Measurement column names.
+    indices: np.ndarray
+        Positions of the measurement columns in the full dataset header.
+    names: np.ndarray
+        Elemental species name of each measurement column.
+    units: np.ndarray
+        Unit of each measurement column.
+    processes: np.ndarray
+        Process description of each measurement column.
+    process_codes: np.ndarray
+        Process code (e.g. XRF26) of each measurement column.
+    column_index: dict[str, int]
+        Maps each measurement column name to its position in `columns`.
+    """
+    def __init__(self, columns: list[str], indices: np.ndarray):
+        measurements = [ElementalMeasurement(i) for i in columns]
+        self.columns = tuple(columns)
+        self.indices = np.asarray(indices, dtype=int)
+        self.names = np.array([i.name for i in measurements], dtype=object)
+        self.units = np.array([i.unit for i in measurements], dtype=object)
+        self.processes = np.array(
+            [i.process for i in measurements], dtype=object
+        )
+        self.process_codes = np.array(
+            [split_header(i)[2] for i in columns], dtype=object
+        )
+        self.column_index = {col: n for n, col in enumerate(self.columns)}
+
+        self._name_columns = {}
+        for n, name in enumerate(self.names):
+            self._name_columns.setdefault(name, []).append(n)
+        self._unit_columns = {}
+
+    def __len__(self):
+        return len(self.columns)
+
+    def columns_for(self, name: str) -> list[int]:
+        """
+        Positions of every column measuring the species `name`, in header
+        order.
+        """
+        return self._name_columns.get(name, [])
+
+    def unit_columns(self, unit: str) -> np.ndarray:
+        """
+        Positions of every column measured in `unit`, in header order.
+        """
+        if unit not in self._unit_columns:
+            self._unit_columns[unit] = np.flatnonzero(self.units == unit)
+        return self._unit_columns[unit]
+
+    def measurement_value(self, column: int, value: float) -> MeasurementValue:
+        return MeasurementValue(
+            self.names[column],
+            self.units[column],
+            self.processes[column],
+            value,
+        )
+
+
+@lru_cache(maxsize=None)
+def split_header(column_name: str) -> tuple[str, str, str] | None:
+    """
+    Splits a measurement column name into its name, unit and process code.
+
+    Parameters
+    ----------
+    column_name: str
+        Column name in the format element_unit_XX_process.
+
+    Returns
+    -------
+    header_parts: tuple[str, str, str] or None
+        Element name, unit ("%" is returned as "percent") and process code,
+        or None if `column_name` does not follow the format.
+    """
+    match = header_pattern.match(column_name)
+    if match is None:
+        return None
+    name, unit, process_code = match.group("name", "unit", "process")
+    if unit == "%":
+        unit = "percent"
+    return name, unit, process_code
+
+
+def parse_elemental_measurements(
+    column_names: list[str]
+) -> tuple[list[ElementalMeasurement], np.ndarray]:
+    """
+    Parses through columns names of the dataset to find elemental measurements.
+
+    Parameters
+    ----------
+    column_names: list[str]
+        List of colummn name strings.
+
+    Returns
+    -------
+    elemental_measurements: list[ElementalMeasurements]
+        List of elemental measurement objects.
+    measurement_indices: np.ndarray
+        Array of indices that correspond to measurement values.
+    """
+    schema = parse_measurement_schema(column_names)
+    elemental_measurements = [ElementalMeasurement(i) for i in schema.columns]
+    return elemental_measurements, schema.indices.copy()
+
+
+def parse_measurement_schema(column_names: list[str]) -> MeasurementSchema:
+    """
+    Parses through column names of the dataset to build a measurement schema.
+
+    Schemas are memoized by the full header, so datasets sharing a column
+    layout only parse it once.
+
+    Parameters
+    ----------
+    column_names: list[str]
+        List of colummn name strings.
+
+    Returns
+    -------
+    schema: MeasurementSchema
+        Compact table of the elemental measurements in the header.
+    """
+    header = tuple(column_names)
+    schema = _schema_registry.get(header)
+    if schema is not None:
+        return schema
+
+    columns = []
+    measurement_indices = []
+    for idx, i in enumerate(header):
+        header_parts = split_header(i)
+        if header_parts is not None and \
+           header_parts[0] not in non_element_names:
+            columns.append(i)
+            measurement_indices.append(idx)
+    schema = MeasurementSchema(
+        columns, np.array(measurement_indices, dtype=int)
+    )
+    _schema_registry[header] = schema
+    return schema
@@ -0,0 +1,248 @@
+# module2/spatial.py
+
+# External Imports
+import numpy as np
+
+
+# Mean radius of the Earth in km.
+EARTH_RADIUS_KM = 6371.0088
+
+# Length of one degree of latitude in km.
+KM_PER_DEGREE = np.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine(lon1, lat1, lon2, lat2) -> np.ndarray:
+    """
+    Great-circle distance between points given in degrees.
+
+    Parameters
+    ----------
+    lon1, lat1, lon2, lat2: float or np.ndarray
+        Longitudes and latitudes of the two sets of points. Arrays broadcast
+        against each other.
+
+    Returns
+    -------
+    distance: np.ndarray
+        Distance in km.
+    """
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2)**2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class SpatialIndex:
+    """
+    Uniform-grid index over sample locations for bounding-box, radius and
+    nearest-neighbour queries.
+
+    Points are bucketed into square longitude/latitude cells and sorted by
+    cell, so a query only looks at the points in the cells it overlaps.
+    Queries crossing the antimeridian are not supported.
+
+    Parameters
+    ----------
+    longitude: np.ndarray
+        Longitude of each dataset row in degrees. Rows with a missing
+        location are never returned.
+    latitude: np.ndarray
+        Latitude of each dataset row in degrees.
+    cell_size: float, optional
+        Cell size in degrees. Default is None, which picks a size giving a
+        few points per cell.
+    """
+    def __init__(self, longitude, latitude, cell_size: float | None = None):
+        self.longitude = np.asarray(longitude, dtype=float)
+        self.latitude = np.asarray(latitude, dtype=float)
+        self._requested_cell_size = cell_size
+        self._build()
+
+    def _build(self):
+        # Lays out the grid for the current points and buckets all of them.
+        rows = np.flatnonzero(
+            np.isfinite(self.longitude) & np.isfinite(self.latitude)
+        )
+        self._npoints = len(rows)
+
+        if len(rows) > 0:
+            lon = self.longitude[rows]
+            lat = self.latitude[rows]
+            self._origin = (lon.min(), lat.min())
+            span = max(lon.max() - lon.min(), lat.max() - lat.min(), 1e-9)
+        else:
+            self._origin = (0.0, 0.0)
+            span = 1.0
+        cell_size = self._requested_cell_size
+        if cell_size is None:
+            cell_size = span / np.sqrt(max(len(rows) / 4, 1))
+        self.cell_size = cell_size
+        self._ny = int(span / cell_size) + 2
+
+        cells = self._cell_ids(rows)
+        order = np.argsort(cells, kind="stable")
+        self._rows = rows[order]
+        self._cells = cells[order]
+
+    def extend(self, longitude, latitude):
+        """
+        Adds rows to the end of the index.
+
+        New points are bucketed into the existing grid and merged into the
+        sorted cell list. Points south or north of the grid share its edge
+        cells, which queries still filter exactly; the grid is only rebuilt
+        when a point lies west of its origin (or the index was empty).
+
+        Parameters
+        ----------
+        longitude, latitude: np.ndarray
+            Location of each new row in degrees.
+        """
+        start = len(self.longitude)
+        self.longitude = np.concatenate(
+            [self.longitude, np.asarray(longitude, dtype=float)]
+        )
+        self.latitude = np.concatenate(
+            [self.latitude, np.asarray(latitude, dtype=float)]
+        )
+        rows = start + np.flatnonzero(
+            np.isfinite(self.longitude[start:]) &
+            np.isfinite(self.latitude[start:])
+        )
+        if len(rows) == 0:
+            return
+        if self._npoints == 0 or \
+           (self.longitude[rows] < self._origin[0]).any():
+            self._build()
+            return
+
+        cells = self._cell_ids(rows)
+        order = np.argsort(cells, kind="stable")
+        at = np.searchsorted(self._cells, cells[order], side="right")
+        self._cells = np.insert(self._cells, at, cells[order])
+        self._rows = np.insert(self._rows, at, rows[order])
+        self._npoints += len(rows)
+
+    def _cell_ids(self, rows: np.ndarray) -> np.ndarray:
+        ix = np.floor(
+            (self.longitude[rows] - self._origin[0]) / self.cell_size
+        ).astype(np.int64)
+        iy = np.floor(
+            (self.latitude[rows] - self._origin[1]) / self.cell_size
+        ).astype(np.int64)
+        return ix * self._ny + np.clip(iy, 0, self._ny - 1)
+
+    def bbox(
+        self,
+        lon_min: float,
+        lat_min: float,
+        lon_max: float,
+        lat_max: float
+    ) -> np.ndarray:
+        """
+        Rows located inside a longitude/latitude bounding box.
+
+        Parameters
+        ----------
+        lon_min, lat_min, lon_max, lat_max: float
+            Edges of the box in degrees (inclusive).
+
+        Returns
+        -------
+        rows: np.ndarray
+            Sorted dataset rows inside the box.
+        """
+        if len(self._rows) == 0:
+            return np.zeros(0, dtype=np.int64)
+        ix0, ix1 = np.floor(
+            (np.array([lon_min, lon_max]) - self._origin[0]) / self.cell_size
+        ).astype(np.int64)
+        iy0, iy1 = np.clip(np.floor(
+            (np.array([lat_min, lat_max]) - self._origin[1]) / self.cell_size
+        ).astype(np.int64), 0, self._ny - 1)
+        ix0 = max(ix0, 0)
+        ix1 = min(ix1, self._cells[-1] // self._ny)
+
+        # Each grid column of the box is one contiguous run of cell ids.
+        columns = np.arange(ix0, ix1 + 1) * self._ny
+        starts = np.searchsorted(self._cells, columns + iy0, side="left")
+        stops = np.searchsorted(self._cells, columns + iy1, side="right")
+        candidates = np.concatenate(
+            [self._rows[i:j] for i, j in zip(starts, stops)] or
+            [np.zeros(0, dtype=np.int64)]
+        )
+
+        lon = self.longitude[candidates]
+        lat = self.latitude[candidates]
+        inside = (lon >= lon_min) & (lon <= lon_max) & \
+                 (lat >= lat_min) & (lat <= lat_max)
+        return np.sort(candidates[inside])
+
+    def radius(
+        self, lon: float, lat: float, radius_km: float
+    ) -> np.ndarray:
+        """
+        Rows within a great-circle distance of a point.
+
+        Parameters
+        ----------
+        lon, lat: float
+            Centre of the search in degrees.
+        radius_km: float
+            Search radius in km.
+
+        Returns
+        -------
+        rows: np.ndarray
+            Sorted dataset rows within `radius_km` of the centre.
+        """
+        rows, _ = self._radius(lon, lat, radius_km)
+        return np.sort(rows)
+
+    def _radius(self, lon, lat, radius_km):
+        dlat = radius_km / KM_PER_DEGREE
+        coslat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if coslat < 1e-6 else min(dlat / coslat, 180.0)
+        candidates = self.bbox(lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+        distance = haversine(
+            lon, lat,
+            self.longitude[candidates], self.latitude[candidates]
+        )
+        within = distance <= radius_km
+        return candidates[within], distance[within]
+
+    def nearest(
+        self, lon: float, lat: float, k: int = 1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The `k` rows nearest to a point.
+
+        The search radius starts from the expected spacing of the points and
+        doubles until at least `k` rows are found inside it, which guarantees
+        they include the `k` nearest.
+
+        Parameters
+        ----------
+        lon, lat: float
+            Query point in degrees.
+        k: int, optional
+            Number of neighbours. Default is 1.
+
+        Returns
+        -------
+        rows: np.ndarray
+            Dataset rows ordered from nearest to farthest.
+        distance: np.ndarray
+            Great-circle distance of each row in km.
+        """
+        k = min(k, self._npoints)
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        radius_km = self.cell_size * KM_PER_DEGREE * np.sqrt(k)
+        while True:
+            rows, distance = self._radius(lon, lat, radius_km)
+            if len(rows) >= k or radius_km > np.pi * EARTH_RADIUS_KM:
+                break
+            radius_km *= 2
+        nearest = np.argsort(distance, kind="stable")[:k]
+        return rows[nearest], distance[nearest]
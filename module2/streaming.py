@@ -0,0 +1,221 @@
+# module2/streaming.py
+
+# External Imports
+import numpy as np
+import pandas as pd
+
+# Local Imports
+from .detection import substitute_below_detection
+from .GeochemDataset import GeochemDataset
+
+
+class RunningGroupStatistics:
+    """
+    Per-group running statistics of every measurement, folded in one dataset
+    (or chunk) at a time.
+
+    Means and variances are merged with Chan et al.'s pairwise update, so the
+    result does not depend on how the data was chunked. NaN values are
+    ignored.
+
+    Parameters
+    ----------
+    by: str
+        Metadata column to group by (e.g. "Rock_Name").
+    include_standards: bool, optional
+        Whether to include standards in the statistics. Default is False.
+    below_detection: str or float, optional
+        "exclude" to leave below-detection values out, or a substitution
+        rule of `substitute_below_detection` (e.g. "half"). Default is
+        "exclude", as in `GeochemDataset.groupby(...).agg`.
+
+    Attributes
+    ----------
+    columns: tuple[str, ...]
+        Measurement columns the statistics are computed for. Set by the first
+        dataset passed to `update`.
+    groups: list
+        Group labels, in order of first appearance.
+    """
+    def __init__(
+        self,
+        by: str,
+        include_standards: bool = False,
+        below_detection: str | float = "exclude"
+    ):
+        self.by = by
+        self.include_standards = include_standards
+        self.below_detection = below_detection
+        self.columns = None
+        self.groups = []
+        self._group_index = {}
+
+        self._count = np.zeros((0, 0))
+        self._mean = np.zeros((0, 0))
+        self._m2 = np.zeros((0, 0))
+        self._min = np.zeros((0, 0))
+        self._max = np.zeros((0, 0))
+
+    def _add_groups(self, labels):
+        new_labels = [i for i in labels if i not in self._group_index]
+        if not new_labels:
+            return
+        for label in new_labels:
+            self._group_index[label] = len(self.groups)
+            self.groups.append(label)
+        pad = ((0, len(new_labels)), (0, 0))
+        self._count = np.pad(self._count, pad)
+        self._mean = np.pad(self._mean, pad)
+        self._m2 = np.pad(self._m2, pad)
+        self._min = np.pad(self._min, pad, constant_values=np.nan)
+        self._max = np.pad(self._max, pad, constant_values=np.nan)
+
+    def update(self, dataset: GeochemDataset):
+        """
+        Folds the rows of `dataset` into the running statistics.
+
+        Parameters
+        ----------
+        dataset: GeochemDataset
+            Dataset (or chunk of a larger dataset) to add.
+        """
+        if self.columns is None:
+            self.columns = dataset.schema.columns
+            ncols = len(self.columns)
+            self._count = np.zeros((0, ncols))
+            self._mean = np.zeros((0, ncols))
+            self._m2 = np.zeros((0, ncols))
+            self._min = np.zeros((0, ncols))
+            self._max = np.zeros((0, ncols))
+        elif dataset.schema.columns != self.columns:
+            raise ValueError("Dataset columns do not match earlier chunks.")
+
+        keep = np.ones(dataset.values.shape[0], dtype=bool)
+        if not self.include_standards:
+            keep = ~dataset.standard_mask
+        labels = dataset.metadata[self.by].to_numpy()[keep]
+        values = np.asarray(dataset.values)[keep]
+        if values.shape[0] == 0:
+            return
+        # Lab exports store below-detection results as negative limits.
+        below = dataset.below_detection[keep]
+        if self.below_detection == "exclude":
+            values = np.where(below, np.nan, values)
+        else:
+            values = substitute_below_detection(
+                values, below, self.below_detection
+            )
+
+        # Sorting rows by group lets every statistic be reduced in one call.
+        codes, uniques = pd.factorize(labels, use_na_sentinel=False)
+        # Missing labels become one None group (NaN keys never compare
+        # equal, so they cannot be looked up in a dict).
+        uniques = np.array(
+            [None if pd.isna(i) else i for i in uniques], dtype=object
+        )
+        order = np.argsort(codes, kind="stable")
+        values = values[order]
+        codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+        measured = ~np.isnan(values)
+        filled = np.where(measured, values, 0.0)
+        count_b = np.add.reduceat(measured, starts, axis=0).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_b = np.add.reduceat(filled, starts, axis=0) / count_b
+        deviation = np.where(measured, values - np.repeat(
+            mean_b, np.diff(np.r_[starts, len(codes)]), axis=0
+        ), 0.0)
+        m2_b = np.add.reduceat(deviation**2, starts, axis=0)
+        min_b = np.fmin.reduceat(values, starts, axis=0)
+        max_b = np.fmax.reduceat(values, starts, axis=0)
+
+        self._add_groups(uniques)
+        rows = np.array(
+            [self._group_index[i] for i in uniques[codes[starts]]]
+        )
+
+        count_a = self._count[rows]
+        mean_a = self._mean[rows]
+        count = count_a + count_b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta = np.where(count_b > 0, mean_b - mean_a, 0.0)
+            weight_b = np.where(count > 0, count_b / count, 0.0)
+        self._mean[rows] = mean_a + delta * weight_b
+        self._m2[rows] = self._m2[rows] + \
+            np.where(count_b > 0, m2_b, 0.0) + delta**2 * count_a * weight_b
+        self._count[rows] = count
+        self._min[rows] = np.fmin(self._min[rows], min_b)
+        self._max[rows] = np.fmax(self._max[rows], max_b)
+
+    def result(self) -> pd.DataFrame:
+        """
+        Current statistics as a DataFrame.
+
+        Returns
+        -------
+        statistics: pd.DataFrame
+            One row per group and a (measurement column, statistic) column
+            for each of count, mean, std, min and max.
+        """
+        empty = self._count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(self._m2 / (self._count - 1))
+        stats = {
+            "count": self._count,
+            "mean": np.where(empty, np.nan, self._mean),
+            "std": np.where(self._count > 1, std, np.nan),
+            "min": self._min,
+            "max": self._max,
+        }
+        columns = pd.MultiIndex.from_product(
+            [self.columns or (), list(stats)]
+        )
+        data = np.stack(list(stats.values()), axis=-1).reshape(
+            len(self.groups), -1
+        )
+        return pd.DataFrame(
+            data,
+            index=pd.Index(self.groups, name=self.by),
+            columns=columns,
+        )
+
+
+def stream_group_statistics(
+    path,
+    by: str = "Rock_Name",
+    chunksize: int = 10000,
+    include_standards: bool = False,
+    below_detection: str | float = "exclude"
+) -> pd.DataFrame:
+    """
+    Computes per-group statistics of a geochemical csv file with bounded
+    memory.
+
+    Parameters
+    ----------
+    path: Path-like
+        Path to the csv file.
+    by: str, optional
+        Metadata column to group by. Default is "Rock_Name".
+    chunksize: int, optional
+        Number of rows read at a time. Default is 10000.
+    include_standards: bool, optional
+        Whether to include standards in the statistics. Default is False.
+    below_detection: str or float, optional
+        Treatment of below-detection values (default is "exclude"), see
+        `RunningGroupStatistics`.
+
+    Returns
+    -------
+    statistics: pd.DataFrame
+        See `RunningGroupStatistics.result`.
+    """
+    running = RunningGroupStatistics(
+        by,
+        include_standards=include_standards,
+        below_detection=below_detection,
+    )
+    for chunk in GeochemDataset.iter_chunks(path, chunksize=chunksize):
+        running.update(chunk)
+    return running.result()